@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# модули приложения импортируются без префикса src.usholidays, как в main.py
+sys.path.insert(0, str(Path(__file__).parent.parent / "src" / "usholidays"))
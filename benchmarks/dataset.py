@@ -0,0 +1,54 @@
+"""
+Загрузка синтетических праздников в базу из настроек:
+
+    python -m benchmarks.dataset --holidays 1000000 --years 1900 2100
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from argparse import ArgumentParser
+import asyncio
+
+from countryholidays.synthetic import load_dataset
+from core.config import settings
+
+
+async def main():
+    parser = ArgumentParser(
+        description="Load synthetic holidays into the database from settings"
+    )
+    parser.add_argument("--holidays", type=int, required=True)
+    parser.add_argument(
+        "--years", type=int, nargs=2, default=[1990, 2050], metavar=("FIRST", "LAST")
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--national-share", type=float, default=0.05)
+    parser.add_argument("--custom-share", type=float, default=0.7)
+    parser.add_argument("--skew", type=float, default=1.0)
+    parser.add_argument(
+        "--keep-indexes",
+        action="store_true",
+        help="update indexes row by row instead of rebuilding them",
+    )
+    args = parser.parse_args()
+
+    engine = create_async_engine(settings.db_url)
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            report = await load_dataset(
+                session,
+                args.holidays,
+                years=range(args.years[0], args.years[1] + 1),
+                seed=args.seed,
+                national_share=args.national_share,
+                custom_share=args.custom_share,
+                skew=args.skew,
+                rebuild_indexes=not args.keep_indexes,
+            )
+    finally:
+        await engine.dispose()
+    print(report)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+"""
+Запрос списка праздников без индекса: ORM с selectinload против
+одной строки на праздник с array_agg штатов. Работает с базой из
+настроек, для большого набора её стоит заполнить за много лет:
+
+    SEED_YEAR_START=1990 SEED_YEAR_END=2050 alembic upgrade head
+    python -m benchmarks.list_query --repeat 20
+"""
+
+from argparse import ArgumentParser
+from statistics import median
+from time import perf_counter
+import asyncio
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from countryholidays.cache import holidays_cache
+from countryholidays.index import HolidayRecord, encode_holidays
+from countryholidays.schemas import HolidaySchema
+from countryholidays.services import get_holidays_service
+from countryholidays.utils import HolidayFilter, StateFilter
+from core.config import settings
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+
+SCENARIOS = {
+    "all": lambda: (HolidayFilter(), {}),
+    "year": lambda: (HolidayFilter(), {"year": "2025", "month": "10"}),
+    "state": lambda: (HolidayFilter(states=StateFilter(name="NY")), {}),
+    "page": lambda: (HolidayFilter(), {"limit": 100}),
+}
+
+_adapter = TypeAdapter(list[HolidaySchema])
+
+
+def render(holidays: list) -> bytes:
+    if all(isinstance(holiday, HolidayRecord) for holiday in holidays):
+        return encode_holidays(holidays)
+    return JSONResponse(
+        _adapter.dump_python(
+            _adapter.validate_python(holidays, from_attributes=True), mode="json"
+        )
+    ).body
+
+
+async def measure(session_factory, query_mode: str, scenario: str, repeat: int):
+    settings.HOLIDAYS_QUERY_MODE = query_mode
+    timings = []
+    body = b""
+    for _ in range(repeat):
+        apiFilter, params = SCENARIOS[scenario]()
+        holidays_cache.invalidate()
+        async with session_factory() as session:
+            started = perf_counter()
+            body = render(await get_holidays_service(session, apiFilter, **params))
+            timings.append(perf_counter() - started)
+    return median(timings), body
+
+
+async def main():
+    parser = ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    settings.HOLIDAYS_INDEX_ENABLED = False
+    engine = create_async_engine(settings.db_url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    for scenario in SCENARIOS:
+        orm_time, orm_body = await measure(
+            session_factory, "orm", scenario, args.repeat
+        )
+        aggregate_time, aggregate_body = await measure(
+            session_factory, "aggregate", scenario, args.repeat
+        )
+        assert orm_body == aggregate_body, f"{scenario}: responses differ"
+        print(
+            f"{scenario:>6}: orm {orm_time * 1000:8.2f}ms, "
+            f"aggregate {aggregate_time * 1000:8.2f}ms, "
+            f"speedup {orm_time / aggregate_time:.1f}x"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
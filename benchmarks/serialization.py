@@ -0,0 +1,84 @@
+"""
+Сериализация списка праздников за год: HolidaySchema по ORM-объектам
+против готового JSON записей индекса.
+
+    python -m benchmarks.serialization --year 2025 --repeat 200
+"""
+
+from argparse import ArgumentParser
+from statistics import median
+from time import perf_counter
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from countryholidays.index import HolidayRecord, encode_holidays
+from countryholidays.models import Holiday, HolidayState, State
+from countryholidays.schemas import HolidaySchema
+from countryholidays.seeding import build_seed_rows
+from core.utils import get_state_holidays, us_states
+
+
+def build_holidays(year: int) -> tuple[list[Holiday], list[HolidayRecord]]:
+    holiday_rows, holiday_states = build_seed_rows(
+        get_state_holidays(state_name, year) for state_name in us_states
+    )
+    states = [
+        State(id=i + 1, name=state_name) for i, state_name in enumerate(us_states)
+    ]
+    holidays = [
+        Holiday(id=i + 1, name=name, date=holiday_date, type=holiday_type, custom=False)
+        for i, (name, holiday_date, holiday_type) in enumerate(holiday_rows)
+    ]
+    for holiday_number, state_number in holiday_states:
+        holidays[holiday_number].states.append(HolidayState(state=states[state_number]))
+
+    holidays.sort(key=lambda holiday: (holiday.date, holiday.id))
+    records = [HolidayRecord.from_holiday(holiday) for holiday in holidays]
+    return holidays, records
+
+
+def measure(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = perf_counter()
+        func()
+        timings.append(perf_counter() - started)
+    return median(timings)
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    holidays, records = build_holidays(args.year)
+    adapter = TypeAdapter(list[HolidaySchema])
+
+    # так ответ собирает FastAPI по response_model
+    def schema_response() -> bytes:
+        return JSONResponse(
+            adapter.dump_python(
+                adapter.validate_python(holidays, from_attributes=True), mode="json"
+            )
+        ).body
+
+    def encoded_response() -> bytes:
+        return encode_holidays(records)
+
+    assert schema_response() == encoded_response()
+
+    schema_time = measure(schema_response, args.repeat)
+    encoded_time = measure(encoded_response, args.repeat)
+    print(
+        f"{len(records)} holidays, "
+        f"{sum(len(holiday.states) for holiday in holidays)} holiday states"
+    )
+    print(f"schema:  {schema_time * 1000:.3f}ms")
+    print(f"encoded: {encoded_time * 1000:.3f}ms")
+    print(f"speedup: {schema_time / encoded_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""
+Нагрузочные сценарии API праздников на синтетических данных.
+Запросы идут через ASGI-приложение целиком, база — отдельная
+{DB_NAME}_bench на сервере из настроек: сервис db из docker-compose
+или локально запущенный postgres.
+
+    python -m benchmarks.suite --sizes 1000 10000 --output results.json \\
+        --baseline benchmarks/baseline.json
+
+С --save-baseline результаты записываются в файл baseline,
+без него сравниваются с ним: сценарии, ставшие медленнее больше
+чем на --tolerance, печатаются, и код выхода становится 1
+"""
+
+from argparse import ArgumentParser
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from math import ceil
+from pathlib import Path
+from time import perf_counter
+import asyncio
+import json
+import platform
+import sys
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from auth.cache import users_cache
+from core.config import settings
+from core.dependencies import async_engine, async_session_factory
+from core.models import Base
+from core.query_log import install_query_log
+from countryholidays.cache import holidays_cache
+from countryholidays.index import holiday_index
+from countryholidays.models import Holiday
+from countryholidays.partitions import holiday_partitions
+from countryholidays.registry import state_registry
+from countryholidays.seeding import populate_db
+from countryholidays.snapshots import snapshot_store
+from countryholidays.synthetic import load_dataset
+from countryholidays.version import dataset_version
+from main import app
+
+
+LIST_SCENARIOS = {
+    "list_year_month": "/holidays?year=2020&month=05",
+    "list_period": "/holidays?start_date=2020-01-01&end_date=2020-03-31",
+    "list_unfiltered": "/holidays",
+    "list_state": "/holidays?state__name=NY&year=2020&month=05",
+    "list_type": "/holidays?type=national&start_date=2020-01-01&end_date=2020-12-31",
+    "list_name": "/holidays?name=Synthetic%20Day%2017",
+    "list_page": "/holidays?start_date=2000-01-01&end_date=2009-12-31&limit=100",
+}
+BACKENDS = {
+    "index": {"HOLIDAYS_INDEX_ENABLED": True},
+    "orm": {"HOLIDAYS_INDEX_ENABLED": False, "HOLIDAYS_QUERY_MODE": "orm"},
+    "aggregate": {"HOLIDAYS_INDEX_ENABLED": False, "HOLIDAYS_QUERY_MODE": "aggregate"},
+}
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    return ordered[max(0, ceil(q * len(ordered)) - 1)]
+
+
+def summarize(timings: list[float]) -> dict[str, float]:
+    ordered = sorted(timings)
+    total = sum(ordered)
+    return {
+        "count": len(ordered),
+        "throughput": len(ordered) / total if total else 0.0,
+        "mean_ms": total / len(ordered) * 1000,
+        "p50_ms": percentile(ordered, 0.5) * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+    }
+
+
+async def measure(
+    operation: Callable[[int], Awaitable[None]], repeat: int
+) -> dict[str, float]:
+    timings = []
+    for i in range(repeat):
+        started = perf_counter()
+        await operation(i)
+        timings.append(perf_counter() - started)
+    return summarize(timings)
+
+
+def reset_state():
+    holidays_cache.invalidate()
+    holiday_index.clear()
+    state_registry.clear()
+    dataset_version.clear()
+    snapshot_store.clear()
+    users_cache.invalidate()
+    holiday_partitions.clear()
+
+
+async def recreate_schema(engine: AsyncEngine):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    reset_state()
+
+
+async def create_database(name: str, drop: bool = False):
+    admin_engine = create_async_engine(
+        make_url(settings.db_url).set(database="postgres"),
+        isolation_level="AUTOCOMMIT",
+    )
+    async with admin_engine.connect() as conn:
+        await conn.execute(text(f'DROP DATABASE IF EXISTS "{name}"'))
+        if not drop:
+            await conn.execute(text(f'CREATE DATABASE "{name}"'))
+    await admin_engine.dispose()
+
+
+async def get_token(client: AsyncClient) -> str:
+    credentials = {"email": "bench@example.com", "password": "bench"}
+    await client.post("/auth/register", json=credentials)
+    response = await client.post(
+        "/auth/login",
+        data={"username": credentials["email"], "password": credentials["password"]},
+    )
+    return response.json()["access_token"]
+
+
+async def run_list_scenarios(
+    client: AsyncClient, size: int, repeat: int, backends: list[str]
+) -> dict[str, dict]:
+    results = {}
+    for backend in backends:
+        for option, value in BACKENDS[backend].items():
+            setattr(settings, option, value)
+        for scenario, url in LIST_SCENARIOS.items():
+            # первый запрос загружает индекс, реестр штатов и версию данных
+            (await client.get(url)).raise_for_status()
+
+            async def get_list(_: int):
+                holidays_cache.invalidate()
+                (await client.get(url)).raise_for_status()
+
+            results[f"{size}/{backend}/{scenario}"] = await measure(get_list, repeat)
+    return results
+
+
+async def run_write_scenarios(
+    client: AsyncClient,
+    session_factory: async_sessionmaker,
+    size: int,
+    repeat: int,
+) -> dict[str, dict]:
+    headers = {"Authorization": f"Bearer {await get_token(client)}"}
+
+    async def create(i: int):
+        response = await client.post(
+            "/holidays",
+            headers=headers,
+            json={
+                "name": f"Bench Day {i}",
+                "date": "2021-07-01",
+                "states": ["CA", "NY"],
+            },
+        )
+        response.raise_for_status()
+
+    results = {f"{size}/create": await measure(create, repeat)}
+
+    async with session_factory() as session:
+        ids = list(
+            await session.scalars(
+                select(Holiday.id)
+                .where(Holiday.name.like("Bench Day %"))
+                .order_by(Holiday.id)
+            )
+        )
+
+    async def update(i: int):
+        response = await client.put(
+            f"/holidays/{ids[i]}",
+            headers=headers,
+            json={
+                "name": f"Bench Day {i} updated",
+                "date": "2021-07-02",
+                "states": ["TX"],
+            },
+        )
+        response.raise_for_status()
+
+    async def delete(i: int):
+        (await client.delete(f"/holidays/{ids[i]}", headers=headers)).raise_for_status()
+
+    results[f"{size}/update"] = await measure(update, repeat)
+    results[f"{size}/delete"] = await measure(delete, repeat)
+    return results
+
+
+async def run_populate_db(
+    engine: AsyncEngine, session_factory: async_sessionmaker, repeat: int
+) -> dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        await recreate_schema(engine)
+        async with session_factory() as session:
+            started = perf_counter()
+            await populate_db(session)
+            timings.append(perf_counter() - started)
+    return summarize(timings)
+
+
+async def run(args) -> dict:
+    database = f"{settings.DB_NAME}_bench"
+    await create_database(database)
+    engine = create_async_engine(
+        async_engine.url.set(database=database),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+    )
+    install_query_log(engine.sync_engine)
+    # фабрика сессий приложения переключается на базу сценариев;
+    # dependency_overrides не подходят: с ними FastAPI заново
+    # разбирает зависимости на каждом запросе
+    async_session_factory.configure(bind=engine)
+    session_factory = async_session_factory
+
+    results = {}
+    try:
+        results["populate_db"] = await run_populate_db(
+            engine, session_factory, args.seed_repeat
+        )
+        for size in args.sizes:
+            await recreate_schema(engine)
+            async with session_factory() as session:
+                await load_dataset(session, size)
+
+            async with AsyncClient(
+                transport=ASGITransport(app=app), base_url="http://bench"
+            ) as client:
+                results.update(
+                    await run_list_scenarios(client, size, args.repeat, args.backends)
+                )
+                results.update(
+                    await run_write_scenarios(
+                        client, session_factory, size, args.write_repeat
+                    )
+                )
+            print(f"{size} holidays done", file=sys.stderr)
+
+        async with engine.connect() as conn:
+            server_version = await conn.scalar(text("SHOW server_version"))
+    finally:
+        async_session_factory.configure(bind=async_engine)
+        await engine.dispose()
+        if not args.keep_database:
+            await create_database(database, drop=True)
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "postgres": server_version,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        },
+        "results": results,
+    }
+
+
+def compare(
+    results: dict[str, dict], baseline: dict[str, dict], tolerance: float
+) -> list[str]:
+    """
+    Регрессия — p50 или p95 хуже базовых больше чем в 1 + tolerance раз
+    """
+    regressions = []
+    for key, stats in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            if stats[metric] > base[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{key} {metric}: {base[metric]:.2f}ms -> {stats[metric]:.2f}ms"
+                )
+    return regressions
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument(
+        "--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS
+    )
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--write-repeat", type=int, default=50)
+    parser.add_argument("--seed-repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--keep-database", action="store_true")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2)
+    if args.output is not None:
+        args.output.write_text(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline is None:
+        return
+    if args.save_baseline:
+        args.baseline.write_text(output + "\n")
+        return
+
+    regressions = compare(
+        report["results"],
+        json.loads(args.baseline.read_text())["results"],
+        args.tolerance,
+    )
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
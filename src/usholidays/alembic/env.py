@@ -1,4 +1,5 @@
 import asyncio
+import logging
 from logging.config import fileConfig
 
 from sqlalchemy import pool, text
@@ -8,7 +9,8 @@ from sqlalchemy.ext.asyncio import async_engine_from_config, AsyncSession
 from alembic import context
 
 from core.config import settings
-from countryholidays.utils import populate_db
+from countryholidays.seeding import populate_db, resync_db
+from countryholidays.partitions import PARTITION_NAME
 
 from core.models import Base
 from countryholidays.models import Holiday, HolidayState, State  # noqa: F401
@@ -22,6 +24,7 @@ config = context.config
 # This line sets up loggers basically.
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
+logger = logging.getLogger("alembic.env")
 config.set_main_option("sqlalchemy.url", settings.db_url)
 
 # add your model's MetaData object here
@@ -30,6 +33,23 @@ config.set_main_option("sqlalchemy.url", settings.db_url)
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    """
+    Годовые секции holidays создаются миграцией и приложением, их
+    таблицы, индексы и копии внешних ключей в моделях не описаны
+    """
+    if type_ == "table":
+        table = object
+    elif type_ == "foreign_key_constraint":
+        table = object.referred_table
+    elif type_ == "index":
+        table = object.table
+    else:
+        return True
+    return PARTITION_NAME.match(table.name) is None
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -54,6 +74,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -61,7 +82,11 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
@@ -83,7 +108,11 @@ async def run_async_migrations() -> None:
         await connection.run_sync(do_run_migrations)
         #####
         async with AsyncSession(connectable) as session:
-            await populate_db(session)
+            seed_report = await populate_db(session)
+            # база уже заполнена: переносятся только изменения библиотеки
+            if seed_report is None:
+                seed_report = await resync_db(session)
+            logger.info("%s", seed_report)
         await connection.execute(text("commit"))
         await connection.execute(text("DROP DATABASE IF EXISTS testing;"))
         await connection.execute(text("CREATE DATABASE testing;"))
@@ -0,0 +1,30 @@
+"""Index holidays by date and id for keyset pagination
+
+Revision ID: 1a49762f1a67
+Revises: 2adb96b85382
+Create Date: 2026-10-18 13:40:07.954113
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "1a49762f1a67"
+down_revision: Union[str, None] = "2adb96b85382"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_holidays_date_id", "holidays", ["date", "id"], unique=False)
+    op.drop_index(op.f("ix_holidays_date"), table_name="holidays")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f("ix_holidays_date"), "holidays", ["date"], unique=False)
+    op.drop_index("ix_holidays_date_id", table_name="holidays")
@@ -0,0 +1,133 @@
+"""Partition holidays by year
+
+Revision ID: 4b8d2f0c6a91
+Revises: 7e559f376571
+Create Date: 2026-10-18 16:00:12.604318
+
+"""
+
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4b8d2f0c6a91"
+down_revision: Union[str, None] = "7e559f376571"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# секции создаются на столько лет вперёд от текущего и от последнего в данных
+PARTITIONS_AHEAD = 5
+
+
+def create_holidays_table(name: str, partitioned: bool):
+    """
+    Столбцы holidays; id берёт значения из прежней sequence holidays_id_seq
+    """
+    op.create_table(
+        name,
+        sa.Column(
+            "id",
+            sa.Integer(),
+            server_default=sa.text("nextval('holidays_id_seq'::regclass)"),
+            autoincrement=False,
+            nullable=False,
+        ),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("custom", sa.Boolean(), server_default="False", nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            *(("id", "date") if partitioned else ("id",)), name=f"{name}_pkey"
+        ),
+        **({"postgresql_partition_by": "RANGE (date)"} if partitioned else {}),
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_constraint(
+        "holidays_states_holiday_id_fkey", "holidays_states", type_="foreignkey"
+    )
+    op.drop_index("ix_holidays_date_id", table_name="holidays")
+    op.drop_index(op.f("ix_holidays_name"), table_name="holidays")
+    op.rename_table("holidays", "holidays_unpartitioned")
+    op.execute("ALTER INDEX holidays_pkey RENAME TO holidays_unpartitioned_pkey")
+
+    create_holidays_table("holidays", partitioned=True)
+
+    bind = op.get_bind()
+    first_year, last_year = bind.execute(
+        sa.text(
+            "SELECT min(extract(year FROM date))::int, max(extract(year FROM date))::int "
+            "FROM holidays_unpartitioned"
+        )
+    ).one()
+    this_year = date.today().year
+    first_year = min(first_year or this_year, this_year)
+    last_year = max(last_year or this_year, this_year) + PARTITIONS_AHEAD
+    for year in range(first_year, last_year + 1):
+        op.execute(
+            f"CREATE TABLE holidays_y{year} PARTITION OF holidays "
+            f"FOR VALUES FROM ('{year:04}-01-01') TO ('{year + 1:04}-01-01')"
+        )
+
+    op.execute(
+        "INSERT INTO holidays (id, name, date, custom, type) "
+        "SELECT id, name, date, custom, type FROM holidays_unpartitioned"
+    )
+    op.execute("ALTER SEQUENCE holidays_id_seq OWNED BY holidays.id")
+    op.drop_table("holidays_unpartitioned")
+    op.create_index(op.f("ix_holidays_name"), "holidays", ["name"], unique=False)
+    op.create_index("ix_holidays_date_id", "holidays", ["date", "id"], unique=False)
+
+    op.add_column("holidays_states", sa.Column("holiday_date", sa.Date()))
+    op.execute(
+        "UPDATE holidays_states SET holiday_date = holidays.date "
+        "FROM holidays WHERE holidays.id = holidays_states.holiday_id"
+    )
+    op.alter_column("holidays_states", "holiday_date", nullable=False)
+    op.create_foreign_key(
+        "holidays_states_holiday_id_holiday_date_fkey",
+        "holidays_states",
+        "holidays",
+        ["holiday_id", "holiday_date"],
+        ["id", "date"],
+        ondelete="CASCADE",
+        onupdate="CASCADE",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(
+        "holidays_states_holiday_id_holiday_date_fkey",
+        "holidays_states",
+        type_="foreignkey",
+    )
+    op.drop_column("holidays_states", "holiday_date")
+    op.drop_index("ix_holidays_date_id", table_name="holidays")
+    op.drop_index(op.f("ix_holidays_name"), table_name="holidays")
+    op.rename_table("holidays", "holidays_partitioned")
+    op.execute("ALTER INDEX holidays_pkey RENAME TO holidays_partitioned_pkey")
+
+    create_holidays_table("holidays", partitioned=False)
+    op.execute(
+        "INSERT INTO holidays (id, name, date, custom, type) "
+        "SELECT id, name, date, custom, type FROM holidays_partitioned"
+    )
+    op.execute("ALTER SEQUENCE holidays_id_seq OWNED BY holidays.id")
+    # секции удаляются вместе с секционированной таблицей
+    op.drop_table("holidays_partitioned")
+    op.create_index(op.f("ix_holidays_name"), "holidays", ["name"], unique=False)
+    op.create_index("ix_holidays_date_id", "holidays", ["date", "id"], unique=False)
+    op.create_foreign_key(
+        "holidays_states_holiday_id_fkey",
+        "holidays_states",
+        "holidays",
+        ["holiday_id"],
+        ["id"],
+    )
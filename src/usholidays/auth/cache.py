@@ -0,0 +1,6 @@
+from core.cache import TTLCache
+from core.config import settings
+
+
+# id пользователя -> (is_active, is_verified, is_superuser)
+users_cache = TTLCache(maxsize=settings.USERS_CACHE_SIZE, ttl=settings.USERS_CACHE_TTL)
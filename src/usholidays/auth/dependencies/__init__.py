@@ -1,8 +1,13 @@
 __all__ = (
     "get_jwt_strategy",
+    "reload_jwt_keys",
     "bearer_transport",
     "get_user_manager",
 )
 
-from auth.dependencies.strategy import get_jwt_strategy, bearer_transport
+from auth.dependencies.strategy import (
+    get_jwt_strategy,
+    reload_jwt_keys,
+    bearer_transport,
+)
 from auth.dependencies.user_manager import get_user_manager
@@ -2,15 +2,114 @@ from fastapi_users.authentication import (
     BearerTransport,
     JWTStrategy,
 )
+from fastapi_users import exceptions
+from fastapi_users.jwt import decode_jwt
+from cryptography.hazmat.primitives.serialization import (
+    load_pem_private_key,
+    load_pem_public_key,
+)
+import jwt
+
+from functools import cache
+from pathlib import Path
+from time import time
+from typing import Optional
+
+from auth.dependencies.user_manager import UserManager
+from auth.models import User
+from core.cache import TTLCache
 from core.config import settings
 
 bearer_transport = BearerTransport(tokenUrl="auth/login")
 
 
-def get_jwt_strategy():
-    return JWTStrategy(
-        secret=settings.private_key_path.read_text(),
+class CachedJWTStrategy(JWTStrategy[User, int]):
+    """
+    Ключи читаются и разбираются один раз, reload_keys перечитывает
+    их при ротации. Проверенные токены хранятся до своего exp,
+    поэтому подпись RS256 одного токена проверяется один раз
+    """
+
+    def __init__(
+        self,
+        private_key_path: Path,
+        public_key_path: Path,
+        lifetime_seconds: Optional[int],
+        algorithm: str,
+        token_cache_size: int,
+    ):
+        super().__init__(
+            secret="", lifetime_seconds=lifetime_seconds, algorithm=algorithm
+        )
+        self.private_key_path = private_key_path
+        self.public_key_path = public_key_path
+        self.verified_tokens = TTLCache(
+            maxsize=token_cache_size, ttl=lifetime_seconds or float("inf")
+        )
+        self.reload_keys()
+
+    def reload_keys(self):
+        self.secret = load_pem_private_key(  # type: ignore
+            self.private_key_path.read_bytes(), password=None
+        )
+        self.public_key = load_pem_public_key(  # type: ignore
+            self.public_key_path.read_bytes()
+        )
+        # токены, подписанные прежним ключом, проверяются заново
+        self.verified_tokens.invalidate()
+
+    def get_user_id(self, token: str) -> str | None:
+        user_id = self.verified_tokens.get(token)
+        if user_id is not None:
+            return user_id
+
+        try:
+            data = decode_jwt(
+                token, self.decode_key, self.token_audience, algorithms=[self.algorithm]
+            )
+        except jwt.PyJWTError:
+            return None
+
+        user_id = data.get("sub")
+        if user_id is None:
+            return None
+
+        expires_at = data.get("exp")
+        self.verified_tokens.set(
+            token, user_id, ttl=None if expires_at is None else expires_at - time()
+        )
+        return user_id
+
+    async def read_token(  # type: ignore[override]
+        self, token: Optional[str], user_manager: UserManager
+    ) -> Optional[User]:
+        if token is None:
+            return None
+
+        user_id = self.get_user_id(token)
+        if user_id is None:
+            return None
+
+        try:
+            parsed_id = user_manager.parse_id(user_id)
+            return await user_manager.get_cached(parsed_id)
+        except (exceptions.UserNotExists, exceptions.InvalidID):
+            return None
+
+
+@cache
+def get_jwt_strategy() -> CachedJWTStrategy:
+    return CachedJWTStrategy(
+        private_key_path=settings.private_key_path,
+        public_key_path=settings.public_key_path,
         lifetime_seconds=settings.lifetime_seconds,
         algorithm=settings.algorithm,
-        public_key=settings.public_key_path.read_text(),
+        token_cache_size=settings.token_cache_size,
     )
+
+
+def reload_jwt_keys():
+    """
+    Вызывается после замены rsa.pem и rsa.pub
+    """
+    get_jwt_strategy().reload_keys()
@@ -4,9 +4,10 @@ from fastapi_users import BaseUserManager, IntegerIDMixin
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from typing import Annotated, Optional
+from typing import Any, Annotated, Optional
 
 from core.dependencies import get_async_session
+from auth.cache import users_cache
 from auth.models import User
 from core.config import settings
 
@@ -19,6 +20,33 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
     reset_password_token_secret = settings.RESET_PASSWORD_TOKEN_SECRET
     verification_token_secret = settings.VERIFICATION_TOKEN_SECRET
 
+    async def get_cached(self, id: int) -> User:
+        """
+        Пользователь для проверки токена. При попадании в кэш users
+        не читается, возвращается объект только с id и флагами
+        """
+        flags = users_cache.get(id)
+        if flags is None:
+            user = await self.get(id)
+            users_cache.set(id, (user.is_active, user.is_verified, user.is_superuser))
+            return user
+
+        is_active, is_verified, is_superuser = flags
+        return User(
+            id=id,
+            is_active=is_active,
+            is_verified=is_verified,
+            is_superuser=is_superuser,
+        )
+
+    async def on_after_update(
+        self, user: User, update_dict: dict[str, Any], request: Optional[Request] = None
+    ):
+        users_cache.pop(user.id)
+
+    async def on_after_delete(self, user: User, request: Optional[Request] = None):
+        users_cache.pop(user.id)
+
     async def on_after_register(self, user: User, request: Optional[Request] = None):
         print(f"User {user.id} has registered.")
 
@@ -1,6 +1,10 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
-from auth.fastapi_users import fastapi_users, auth_backend
+from typing import Annotated
+
+from auth.cache import users_cache
+from auth.fastapi_users import auth_backend, current_active_user, fastapi_users
+from auth.models import User
 from auth.schemas import UserCreate, UserRead
 
 router = APIRouter(tags=["Auth"], prefix="/auth")
@@ -11,3 +15,10 @@ router.include_router(router=fastapi_users.get_auth_router(auth_backend))
 
 # /register
 router.include_router(router=fastapi_users.get_register_router(UserRead, UserCreate))
+
+
+@router.get("/cache/stats")
+async def get_users_cache_stats(
+    _: Annotated[User, Depends(current_active_user)],
+):
+    return users_cache.stats()
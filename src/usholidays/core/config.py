@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 BASE_DIR = Path(__file__).parent.parent
@@ -9,6 +10,8 @@ class JWTSettings(BaseSettings):
     public_key_path: Path = BASE_DIR / "creds" / "rsa.pub"
     lifetime_seconds: int = 120
     algorithm: str = "RS256"
+    # проверенные токены, подпись которых не проверяется повторно до exp
+    token_cache_size: int = 4096
     RESET_PASSWORD_TOKEN_SECRET: str
     VERIFICATION_TOKEN_SECRET: str
 
@@ -16,12 +19,52 @@ class JWTSettings(BaseSettings):
 
 
 class Settings(JWTSettings):
+    DEBUG: bool = False
+
     DB_HOST: str
     DB_PORT: int
     DB_USER: str
     DB_PASS: str
     DB_NAME: str
 
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    # -1 — соединения не пересоздаются по возрасту
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = False
+    # кэш подготовленных выражений asyncpg на соединение, 0 — для pgbouncer
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # None — медленные запросы не пишутся в лог
+    DB_SLOW_QUERY_MS: float | None = 200
+
+    HOLIDAYS_CACHE_SIZE: int = 1024
+    HOLIDAYS_CACHE_TTL: float = 300
+    HOLIDAYS_INDEX_ENABLED: bool = True
+    # запрос списка без индекса: orm — объекты Holiday со штатами через
+    # selectinload, aggregate — одна строка на праздник с array_agg штатов
+    HOLIDAYS_QUERY_MODE: Literal["orm", "aggregate"] = "orm"
+    # версия данных перечитывается из базы не чаще раза в столько секунд,
+    # чтобы видеть изменения других процессов; None — один процесс
+    DATASET_VERSION_TTL: float | None = 1.0
+    # годы плотной матрицы POST /holidays/lookup, около 3.7MB на 200 лет;
+    # праздники за их пределами проверяются по словарю
+    HOLIDAYS_LOOKUP_YEAR_START: int = 1900
+    HOLIDAYS_LOOKUP_YEAR_END: int = 2100
+    HOLIDAYS_SNAPSHOTS_DIR: Path = BASE_DIR / "snapshots"
+    # секции holidays создаются при старте на столько лет вперёд от текущего
+    HOLIDAYS_PARTITIONS_AHEAD: int = 5
+
+    # флаги пользователя для проверки токена, обновляются при изменении пользователя
+    USERS_CACHE_SIZE: int = 4096
+    USERS_CACHE_TTL: float = 30
+
+    SEED_YEAR_START: int = 2025
+    SEED_YEAR_END: int = 2025
+    # None — по числу ядер, 1 — без пула процессов
+    SEED_WORKERS: int | None = None
+
     @property
     def db_url(self):
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
@@ -3,11 +3,27 @@ from sqlalchemy.ext.asyncio import (
     async_sessionmaker,
     # async_scoped_session,
 )
+from sqlalchemy.engine import make_url
 
 # from asyncio import current_task
 from core.config import settings
-
-async_engine = create_async_engine(url=settings.db_url, echo=True)
+from core.query_log import install_query_log
+
+async_engine = create_async_engine(
+    url=make_url(settings.db_url).update_query_dict(
+        {"prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)}
+    ),
+    echo=settings.DB_ECHO,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+install_query_log(
+    async_engine.sync_engine,
+    None if settings.DB_SLOW_QUERY_MS is None else settings.DB_SLOW_QUERY_MS / 1000,
+)
 async_session_factory = async_sessionmaker(
     bind=async_engine, expire_on_commit=False, autoflush=False, autocommit=False
 )
@@ -18,6 +34,10 @@ async def get_async_session():
         yield async_session
 
 
+def get_async_session_factory():
+    return async_session_factory
+
+
 async def dispose_engine():
     await async_engine.dispose()
 
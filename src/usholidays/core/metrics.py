@@ -0,0 +1,257 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from sqlalchemy.pool import QueuePool
+
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+from bisect import bisect_left
+from time import perf_counter
+from typing import TypeVar
+
+from core.cache import TTLCache
+from core.config import settings
+from core.query_log import track_queries
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+STATEMENTS_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+# (суффикс имени, метки, значение)
+Sample = tuple[str, dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_sample(name: str, labels: dict[str, str], value: float) -> str:
+    if labels:
+        label_text = ",".join(
+            f'{label}="{_escape(label_value)}"' for label, label_value in labels.items()
+        )
+        name = f"{name}{{{label_text}}}"
+    return f"{name} {value}"
+
+
+class Metric:
+    """
+    Метрика в текстовом формате Prometheus, значения хранятся
+    по кортежам значений меток в порядке labelnames
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> Iterable[Sample]:
+        return ()
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        lines.extend(
+            _format_sample(self.name + suffix, labels, value)
+            for suffix, labels, value in self.samples()
+        )
+        return "\n".join(lines)
+
+    def _labels(self, labelvalues: tuple[str, ...]) -> dict[str, str]:
+        return dict(zip(self.labelnames, labelvalues))
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = defaultdict(float)
+
+    def inc(self, *labelvalues: str, amount: float = 1):
+        self._values[labelvalues] += amount
+
+    def dec(self, *labelvalues: str, amount: float = 1):
+        self._values[labelvalues] -= amount
+
+    def samples(self) -> Iterable[Sample]:
+        for labelvalues, value in self._values.items():
+            yield "", self._labels(labelvalues), value
+
+
+class CallbackGauge(Metric):
+    """
+    Значения читаются в момент запроса метрик
+    """
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._callbacks: list[tuple[tuple[str, ...], Callable[[], float]]] = []
+
+    def add_callback(self, callback: Callable[[], float], *labelvalues: str):
+        self._callbacks.append((labelvalues, callback))
+
+    def samples(self) -> Iterable[Sample]:
+        for labelvalues, callback in self._callbacks:
+            yield "", self._labels(labelvalues), callback()
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # счётчики по корзинам без накопления, последняя — +Inf
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = defaultdict(float)
+
+    def observe(self, value: float, *labelvalues: str):
+        counts = self._counts.get(labelvalues)
+        if counts is None:
+            counts = self._counts[labelvalues] = [0] * (len(self.buckets) + 1)
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[labelvalues] += value
+
+    def samples(self) -> Iterable[Sample]:
+        for labelvalues, counts in self._counts.items():
+            labels = self._labels(labelvalues)
+            total = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                total += count
+                le = bound if isinstance(bound, str) else f"{bound:g}"
+                yield "_bucket", {**labels, "le": le}, total
+            yield "_sum", labels, self._sums[labelvalues]
+            yield "_count", labels, total
+
+
+M = TypeVar("M", bound=Metric)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: list[Metric] = []
+
+    def register(self, metric: M) -> M:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+registry = MetricsRegistry()
+
+requests_in_flight = registry.register(
+    Gauge("http_requests_in_flight", "HTTP requests being served", ["method"])
+)
+request_duration = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency",
+        ["method", "route", "status"],
+    )
+)
+db_statements = registry.register(
+    Histogram(
+        "db_statements_per_request",
+        "SQL statements executed per HTTP request",
+        ["method", "route"],
+        buckets=STATEMENTS_BUCKETS,
+    )
+)
+db_time = registry.register(
+    Histogram(
+        "db_time_per_request_seconds",
+        "Time spent in SQL statements per HTTP request",
+        ["method", "route"],
+    )
+)
+db_pool = registry.register(
+    CallbackGauge("db_pool_connections", "DB pool connections", ["state"])
+)
+cache_hit_ratio = registry.register(
+    CallbackGauge("cache_hit_ratio", "Cache hits to lookups ratio", ["cache"])
+)
+cache_size = registry.register(
+    CallbackGauge("cache_entries", "Entries stored in cache", ["cache"])
+)
+
+
+def register_pool(pool: QueuePool):
+    db_pool.add_callback(pool.size, "size")
+    db_pool.add_callback(pool.checkedout, "checked_out")
+    db_pool.add_callback(pool.overflow, "overflow")
+
+
+def register_cache(name: str, cache: TTLCache):
+    cache_hit_ratio.add_callback(lambda: cache.stats()["hit_ratio"], name)
+    cache_size.add_callback(lambda: len(cache), name)
+
+
+class MetricsMiddleware:
+    """
+    Задержка ответа по маршрутам, запросы в обработке и работа
+    с базой за время каждого HTTP-запроса. При DEBUG число
+    запросов к базе отдаётся в заголовке X-SQL-Statements
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # у потоковых ответов учтены запросы до начала тела
+                if settings.DEBUG:
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"x-sql-statements", str(query_stats.statements).encode()),
+                    ]
+            await send(message)
+
+        with track_queries() as query_stats:
+            requests_in_flight.inc(method)
+            started = perf_counter()
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                duration = perf_counter() - started
+                requests_in_flight.dec(method)
+
+                # шаблон пути маршрута, а не сам путь: /holidays/{id}
+                route = getattr(scope.get("route"), "path", "unmatched")
+                request_duration.observe(duration, method, route, str(status_code))
+                db_statements.observe(query_stats.statements, method, route)
+                db_time.observe(query_stats.duration, method, route)
+
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,111 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from hashlib import blake2b
+from time import perf_counter
+import logging
+import re
+
+
+logger = logging.getLogger("usholidays.slow_queries")
+
+_WHITESPACE = re.compile(r"\s+")
+# asyncpg добавляет к параметрам приведение типа: $1::INTEGER
+_PARAMETER = re.compile(r"\$\d+(?:::\w+(?:\[\])?)?")
+# списки параметров разной длины дают один отпечаток: IN ($1, $2, $3) -> IN (...)
+_PARAMETER_LIST = re.compile(
+    rf"\(\s*{_PARAMETER.pattern}(?:\s*,\s*{_PARAMETER.pattern})*\s*\)"
+)
+
+
+def normalize_statement(statement: str) -> str:
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _PARAMETER_LIST.sub("(...)", statement)
+    return _PARAMETER.sub("?", statement)
+
+
+def get_statement_fingerprint(statement: str) -> str:
+    return blake2b(normalize_statement(statement).encode(), digest_size=8).hexdigest()
+
+
+@dataclass
+class QueryStats:
+    statements: int = 0
+    duration: float = 0.0
+
+
+# счётчики вложенных областей: HTTP-запроса, теста и т.п.
+current_query_stats: ContextVar[tuple[QueryStats, ...]] = ContextVar(
+    "current_query_stats", default=()
+)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Считает запросы к базе, выполненные внутри блока
+    """
+    query_stats = QueryStats()
+    token = current_query_stats.set((*current_query_stats.get(), query_stats))
+    try:
+        yield query_stats
+    finally:
+        current_query_stats.reset(token)
+
+
+def install_query_log(engine: Engine, slow_query_threshold: float | None = None):
+    """
+    Считает запросы и время в базе в областях track_queries и пишет в лог
+    запросы дольше slow_query_threshold секунд: отпечаток нормализованного
+    текста, длительность и число строк
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        conn.info.setdefault("query_started", []).append(perf_counter())
+
+    def finish_statement(conn) -> float:
+        duration = perf_counter() - conn.info["query_started"].pop()
+        for query_stats in current_query_stats.get():
+            query_stats.statements += 1
+            query_stats.duration += duration
+        return duration
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = finish_statement(conn)
+
+        if slow_query_threshold is None or duration < slow_query_threshold:
+            return
+        fingerprint = get_statement_fingerprint(statement)
+        logger.warning(
+            "Slow query %s took %.1fms, %s rows: %s",
+            fingerprint,
+            duration * 1000,
+            cursor.rowcount,
+            normalize_statement(statement),
+            extra={
+                "fingerprint": fingerprint,
+                "duration": duration,
+                "rowcount": cursor.rowcount,
+            },
+        )
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        # after_cursor_execute для упавшего запроса не вызывается,
+        # его время снимается здесь, запрос тоже учитывается
+        conn = exception_context.connection
+        if (
+            conn is None
+            or exception_context.statement is None
+            or not conn.info.get("query_started")
+        ):
+            return
+        finish_statement(conn)
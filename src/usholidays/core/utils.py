@@ -1,3 +1,6 @@
+from datetime import date
+from functools import cache
+
 import holidays
 
 
@@ -55,14 +58,20 @@ us_states = [
 ]
 
 
-def get_national_holidays_names() -> list[str]:
-    return [
-        name
-        for _, name in holidays.country_holidays(
-            "US", years=2025, categories=holidays.PUBLIC
-        ).items()
-    ]
+@cache
+def get_national_holidays_names(year: int = 2025) -> frozenset[str]:
+    return frozenset(
+        holidays.country_holidays("US", years=year, categories=holidays.PUBLIC).values()
+    )
+
+
+def get_country_holidays_by_state(name: str, year: int = 2025):
+    return holidays.country_holidays("US", years=year, subdiv=name)
 
 
-def get_country_holidays_by_state(name: str):
-    return holidays.country_holidays("US", years=2025, state=name)
+def get_state_holidays(name: str, year: int) -> tuple[str, list[tuple[date, str]]]:
+    """
+    Выполняется в процессах пула при заполнении базы,
+    поэтому возвращает только простые типы
+    """
+    return name, list(get_country_holidays_by_state(name, year).items())
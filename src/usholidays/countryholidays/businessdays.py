@@ -0,0 +1,171 @@
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, defaultdict
+from datetime import date
+
+from countryholidays.index import (
+    STATE_BITS,
+    HolidayIndex,
+    HolidayRecord,
+    holiday_index,
+)
+
+
+MAX_ORDINAL = date.max.toordinal()
+
+
+def get_weekdays_before(ordinal: int) -> int:
+    """
+    Число будних дней с 0001-01-01 (понедельник) до ordinal, не включая его
+    """
+    weeks, days = divmod(ordinal - 1, 7)
+    return weeks * 5 + min(days, 5)
+
+
+def get_weekday_by_rank(rank: int) -> int:
+    """
+    Порядковый номер будня, перед которым ровно rank будних дней
+    """
+    weeks, days = divmod(rank, 5)
+    return 1 + weeks * 7 + days
+
+
+class BusinessCalendar:
+    """
+    Рабочие дни штатов: всё, кроме субботы, воскресенья и праздников
+    штата. Для штата хранится отсортированный массив порядковых номеров
+    праздничных будней — разреженная накопленная сумма нерабочих дней:
+    позиция даты в массиве равна числу праздников до неё. Поэтому
+    подсчёт за период и сдвиг на n рабочих дней стоят O(log n) без
+    обращений к базе. Массивы строятся из индекса при первом запросе и
+    обновляются по каждой изменённой в нём записи
+    """
+
+    def __init__(self, index: HolidayIndex):
+        self.index = index
+        self.built = False
+        self._ordinals: dict[str, array] = {}
+        # праздников штата на дату: массив хранит дату один раз
+        self._counts: dict[str, Counter[int]] = {}
+        index.add_listener(self.on_index_change)
+
+    def on_index_change(self, old: HolidayRecord | None, new: HolidayRecord | None):
+        if old is None and new is None:
+            self.clear()
+            return
+        if not self.built:
+            return
+        if old is not None:
+            self._remove(old)
+        if new is not None:
+            self._add(new)
+
+    def _get_ordinal(self, record: HolidayRecord) -> int | None:
+        # праздник в выходной не меняет число рабочих дней
+        if record.date.weekday() >= 5:
+            return None
+        return record.date.toordinal()
+
+    def _add(self, record: HolidayRecord):
+        ordinal = self._get_ordinal(record)
+        if ordinal is None:
+            return
+        for holiday_state in record.states:
+            state_name = holiday_state.state.name
+            counts = self._counts.setdefault(state_name, Counter())
+            counts[ordinal] += 1
+            if counts[ordinal] == 1:
+                insort(self._ordinals.setdefault(state_name, array("l")), ordinal)
+
+    def _remove(self, record: HolidayRecord):
+        ordinal = self._get_ordinal(record)
+        if ordinal is None:
+            return
+        for holiday_state in record.states:
+            state_name = holiday_state.state.name
+            counts = self._counts[state_name]
+            counts[ordinal] -= 1
+            if counts[ordinal] == 0:
+                del counts[ordinal]
+                ordinals = self._ordinals[state_name]
+                del ordinals[bisect_left(ordinals, ordinal)]
+
+    def build(self):
+        counts: dict[str, Counter[int]] = defaultdict(Counter)
+        for record in self.index.between(date.min, date.max):
+            ordinal = self._get_ordinal(record)
+            if ordinal is None:
+                continue
+            for holiday_state in record.states:
+                counts[holiday_state.state.name][ordinal] += 1
+
+        self._counts = dict(counts)
+        self._ordinals = {
+            state_name: array("l", sorted(state_counts))
+            for state_name, state_counts in counts.items()
+        }
+        self.built = True
+
+    def ensure_built(self):
+        if not self.built:
+            self.build()
+
+    def clear(self):
+        self.built = False
+        self._ordinals = {}
+        self._counts = {}
+
+    def _get_ordinals(self, state_name: str) -> array:
+        if state_name not in STATE_BITS:
+            raise KeyError(state_name)
+        return self._ordinals.get(state_name, array("l"))
+
+    def count(self, state_name: str, start: date, end: date) -> int:
+        """
+        Рабочие дни штата с start по end включительно
+        """
+        if end < start:
+            return 0
+        ordinals = self._get_ordinals(state_name)
+        start_ordinal = start.toordinal()
+        end_ordinal = end.toordinal()
+        weekdays = get_weekdays_before(end_ordinal + 1) - get_weekdays_before(
+            start_ordinal
+        )
+        holidays = bisect_right(ordinals, end_ordinal) - bisect_left(
+            ordinals, start_ordinal
+        )
+        return weekdays - holidays
+
+    def add(self, state_name: str, start: date, days: int) -> date:
+        """
+        Рабочий день через days рабочих дней после start (до него при
+        отрицательном days); при days == 0 — start или ближайший за ним
+        рабочий день. ValueError, если результат вне диапазона дат
+        """
+        ordinals = self._get_ordinals(state_name)
+        # номер искомого дня среди рабочих дней, считая с 0001-01-01
+        anchor = start.toordinal() + (1 if days > 0 else 0)
+        rank = (
+            get_weekdays_before(anchor)
+            - bisect_left(ordinals, anchor)
+            + days
+            - (1 if days > 0 else 0)
+        )
+        if rank < 0:
+            raise ValueError("Business day is out of range")
+
+        # будний день с номером rank + праздники не позже него; итерация
+        # монотонна и останавливается на первом подходящем рабочем дне
+        weekday_rank = rank
+        while True:
+            ordinal = get_weekday_by_rank(weekday_rank)
+            if ordinal > MAX_ORDINAL:
+                raise ValueError("Business day is out of range")
+            next_rank = rank + bisect_right(ordinals, ordinal)
+            if next_rank == weekday_rank:
+                return date.fromordinal(ordinal)
+            weekday_rank = next_rank
+
+
+business_calendar = BusinessCalendar(holiday_index)
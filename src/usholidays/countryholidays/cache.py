@@ -0,0 +1,47 @@
+from datetime import date
+from typing import Any
+
+from core.cache import TTLCache
+from core.config import settings
+from countryholidays.utils import HolidayFilter
+
+
+holidays_cache = TTLCache(
+    maxsize=settings.HOLIDAYS_CACHE_SIZE, ttl=settings.HOLIDAYS_CACHE_TTL
+)
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return tuple(
+            sorted(
+                (key, _freeze(item)) for key, item in value.items() if item is not None
+            )
+        )
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted(_freeze(item) for item in value))
+    return value
+
+
+def get_holidays_cache_key(
+    apiFilter: HolidayFilter,
+    year: str | None = None,
+    month: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    limit: int | None = None,
+    after: tuple[date, int] | None = None,
+) -> tuple:
+    """
+    Ключ не зависит от порядка значений в списочных фильтрах
+    и от незаданных полей фильтра
+    """
+    return (
+        _freeze(apiFilter.model_dump()),
+        None if year is None else int(year),
+        None if month is None else int(month),
+        start,
+        end,
+        limit,
+        after,
+    )
@@ -0,0 +1,93 @@
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy import Select
+
+from collections.abc import AsyncIterator, Iterable
+from datetime import date
+from enum import Enum
+from io import StringIO
+import csv
+import json
+
+
+EXPORT_BATCH_SIZE = 1000
+
+
+class ExportFormatEnum(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormatEnum.ndjson: "application/x-ndjson",
+    ExportFormatEnum.csv: "text/csv",
+}
+
+_json_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def _group_rows(
+    rows: Iterable[tuple[int, str, date, str | None]],
+    current: list | None,
+) -> tuple[list[list], list | None]:
+    """
+    Склеивает идущие подряд строки одного праздника.
+    Последний праздник пачки возвращается отдельно: его штаты
+    могут продолжиться в следующей пачке
+    """
+    holidays = []
+    for holiday_id, name, holiday_date, state_name in rows:
+        if current is None or current[0] != holiday_id:
+            if current is not None:
+                holidays.append(current)
+            current = [holiday_id, name, holiday_date, []]
+        if state_name is not None:
+            current[3].append(state_name)
+    return holidays, current
+
+
+def _encode_ndjson(holidays: list[list]) -> str:
+    return "".join(
+        _json_encoder.encode(
+            {"name": name, "date": holiday_date.isoformat(), "states": states}
+        )
+        + "\n"
+        for _, name, holiday_date, states in holidays
+    )
+
+
+def _encode_csv(holidays: list[list]) -> str:
+    buffer = StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows(
+        (name, holiday_date.isoformat(), ",".join(states))
+        for _, name, holiday_date, states in holidays
+    )
+    return buffer.getvalue()
+
+
+async def stream_holidays(
+    session_factory: async_sessionmaker[AsyncSession],
+    stmt: Select,
+    export_format: ExportFormatEnum,
+) -> AsyncIterator[bytes]:
+    """
+    Читает строки серверным курсором пачками по EXPORT_BATCH_SIZE,
+    поэтому память не зависит от размера выгрузки. Сессия открывается
+    здесь же: зависимости с yield закрываются до отправки тела ответа
+    """
+    encode = _encode_ndjson if export_format == ExportFormatEnum.ndjson else _encode_csv
+    if export_format == ExportFormatEnum.csv:
+        yield b"name,date,states\n"
+
+    async with session_factory() as session:
+        result = await session.stream(
+            stmt.execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        current = None
+        async for rows in result.partitions():
+            holidays, current = _group_rows(rows, current)
+            if holidays:
+                yield encode(holidays).encode()
+
+        if current is not None:
+            yield encode([current]).encode()
@@ -0,0 +1,358 @@
+from fastapi_filter.contrib.sqlalchemy import Filter
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from asyncio import Lock
+from bisect import bisect_left, bisect_right
+from calendar import monthrange
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import date
+from functools import lru_cache
+from itertools import islice
+from json.encoder import encode_basestring
+
+from countryholidays.models import Holiday, HolidayState, State
+from countryholidays.utils import HolidayFilter
+from core.models import HolidayTypeEnum
+from core.utils import us_states
+
+
+STATE_BITS = {state_name: 1 << i for i, state_name in enumerate(us_states)}
+
+
+@dataclass(frozen=True, slots=True)
+class StateRef:
+    name: str
+
+
+@dataclass(frozen=True, slots=True)
+class HolidayStateRef:
+    state: StateRef
+
+
+_HOLIDAY_STATE_REFS = [HolidayStateRef(StateRef(name)) for name in us_states]
+
+
+@lru_cache(maxsize=1024)
+def get_states_by_mask(mask: int) -> tuple[HolidayStateRef, ...]:
+    return tuple(
+        holiday_state
+        for i, holiday_state in enumerate(_HOLIDAY_STATE_REFS)
+        if mask >> i & 1
+    )
+
+
+@lru_cache(maxsize=1024)
+def get_states_json(mask: int) -> str:
+    return (
+        "["
+        + ",".join(
+            encode_basestring(holiday_state.state.name)
+            for holiday_state in get_states_by_mask(mask)
+        )
+        + "]"
+    )
+
+
+def get_states_mask(state_names) -> int:
+    mask = 0
+    for state_name in state_names:
+        mask |= STATE_BITS.get(state_name, 0)
+    return mask
+
+
+@dataclass(frozen=True, slots=True)
+class HolidayRecord:
+    """
+    Праздник из индекса. Штаты хранятся битовой маской в порядке us_states,
+    атрибут states совместим с HolidaySchema
+    """
+
+    id: int
+    name: str
+    date: date
+    custom: bool
+    type: HolidayTypeEnum
+    mask: int
+    encoded: bytes = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # JSON праздника считается один раз, тот же, что даёт HolidaySchema
+        object.__setattr__(
+            self,
+            "encoded",
+            (
+                f'{{"name":{encode_basestring(self.name)},'
+                f'"date":"{self.date.isoformat()}",'
+                f'"states":{get_states_json(self.mask)}}}'
+            ).encode(),
+        )
+
+    @property
+    def states(self) -> tuple[HolidayStateRef, ...]:
+        return get_states_by_mask(self.mask)
+
+    @classmethod
+    def from_holiday(cls, holiday: Holiday) -> "HolidayRecord":
+        return cls(
+            id=holiday.id,
+            name=holiday.name,
+            date=holiday.date,
+            custom=holiday.custom,
+            type=HolidayTypeEnum(holiday.type),
+            mask=get_states_mask(
+                holiday_state.state.name for holiday_state in holiday.states
+            ),
+        )
+
+
+def encode_holidays(records: Iterable[HolidayRecord]) -> bytes:
+    """
+    Тело ответа list[HolidaySchema] из готовых байтов записей
+    """
+    return b"[" + b",".join(record.encoded for record in records) + b"]"
+
+
+def _get_state_mask_filter(state_filter: Filter) -> int | None:
+    mask = None
+    for field_name, value in state_filter.filtering_fields:
+        match field_name:
+            case "name":
+                field_mask = STATE_BITS.get(value, 0)
+            case "name__in":
+                field_mask = get_states_mask(value)
+            case _:
+                raise ValueError(f"Unsupported state filter field: {field_name}")
+        mask = field_mask if mask is None else mask & field_mask
+    return mask
+
+
+def _get_predicate(
+    apiFilter: HolidayFilter,
+) -> Callable[[HolidayRecord], bool] | None:
+    """
+    Повторяет семантику HolidayFilter.filter для запроса
+    с outer join на штаты: праздник подходит, если хотя бы
+    один его штат удовлетворяет всем условиям на штат
+    """
+    checks: list[Callable[[HolidayRecord], bool]] = []
+
+    for field_name, value in apiFilter.filtering_fields:
+        field_value = getattr(apiFilter, field_name)
+        if isinstance(field_value, Filter):
+            mask = _get_state_mask_filter(field_value)
+            if mask is not None:
+                checks.append(lambda record, mask=mask: record.mask & mask != 0)
+        elif field_name.endswith("__in"):
+            attr = field_name.removesuffix("__in")
+            checks.append(
+                lambda record, attr=attr, value=value: getattr(record, attr) in value
+            )
+        else:
+            checks.append(
+                lambda record, attr=field_name, value=value: getattr(record, attr)
+                == value
+            )
+
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+    return lambda record: all(check(record) for check in checks)
+
+
+def get_next(
+    records: list[HolidayRecord], dates: list[date], day: date, n: int
+) -> list[HolidayRecord]:
+    """
+    n праздников начиная с day, по возрастанию (date, id)
+    """
+    position = bisect_left(dates, day)
+    return records[position : position + n]
+
+
+def get_previous(
+    records: list[HolidayRecord], dates: list[date], day: date, n: int
+) -> list[HolidayRecord]:
+    """
+    n праздников до day, от ближайшего к более ранним
+    """
+    position = bisect_left(dates, day)
+    return records[max(position - n, 0) : position][::-1]
+
+
+# (старая запись, новая запись); (None, None) — индекс загружен или очищен целиком
+IndexListener = Callable[[HolidayRecord | None, HolidayRecord | None], None]
+
+
+class HolidayIndex:
+    """
+    Индекс праздников в памяти: записи отсортированы по (date, id),
+    параллельный массив дат позволяет искать периоды бинарным поиском
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._lock = Lock()
+        self._records: list[HolidayRecord] = []
+        self._dates: list[date] = []
+        self._by_id: dict[int, HolidayRecord] = {}
+        self._listeners: list[IndexListener] = []
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    async def load(self, session: AsyncSession):
+        masks: dict[int, int] = defaultdict(int)
+        states_result = await session.execute(
+            select(HolidayState.holiday_id, State.name).join(State)
+        )
+        for holiday_id, state_name in states_result:
+            masks[holiday_id] |= STATE_BITS.get(state_name, 0)
+
+        holidays_result = await session.execute(
+            select(Holiday.id, Holiday.name, Holiday.date, Holiday.custom, Holiday.type)
+        )
+        records = [
+            HolidayRecord(
+                id=holiday_id,
+                name=name,
+                date=holiday_date,
+                custom=custom,
+                type=HolidayTypeEnum(holiday_type),
+                mask=masks[holiday_id],
+            )
+            for holiday_id, name, holiday_date, custom, holiday_type in holidays_result
+        ]
+        records.sort(key=lambda record: (record.date, record.id))
+
+        self._records = records
+        self._dates = [record.date for record in records]
+        self._by_id = {record.id: record for record in records}
+        self.loaded = True
+        self._notify(None, None)
+
+    async def ensure_loaded(self, session: AsyncSession):
+        if self.loaded:
+            return
+        async with self._lock:
+            if not self.loaded:
+                await self.load(session)
+
+    def clear(self):
+        self.loaded = False
+        self._records = []
+        self._dates = []
+        self._by_id = {}
+        self._notify(None, None)
+
+    def add_listener(self, listener: IndexListener):
+        """
+        Производные от индекса структуры узнают об изменённых записях
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, old: HolidayRecord | None, new: HolidayRecord | None):
+        for listener in self._listeners:
+            listener(old, new)
+
+    def get(self, id: int) -> HolidayRecord | None:
+        return self._by_id.get(id)
+
+    def upsert(self, record: HolidayRecord):
+        if not self.loaded:
+            return
+        old = self._pop(record.id)
+        position = bisect_right(self._dates, record.date)
+        # среди праздников с той же датой порядок задаётся id
+        while (
+            position > 0
+            and self._dates[position - 1] == record.date
+            and self._records[position - 1].id > record.id
+        ):
+            position -= 1
+        self._records.insert(position, record)
+        self._dates.insert(position, record.date)
+        self._by_id[record.id] = record
+        self._notify(old, record)
+
+    def remove(self, id: int):
+        record = self._pop(id)
+        if record is not None:
+            self._notify(record, None)
+
+    def _pop(self, id: int) -> HolidayRecord | None:
+        record = self._by_id.pop(id, None)
+        if record is None:
+            return None
+        position = bisect_left(self._dates, record.date)
+        while self._records[position].id != id:
+            position += 1
+        del self._records[position]
+        del self._dates[position]
+        return record
+
+    def between(self, start: date, end: date) -> list[HolidayRecord]:
+        return self._records[
+            bisect_left(self._dates, start) : bisect_right(self._dates, end)
+        ]
+
+    def next(self, day: date, n: int) -> list[HolidayRecord]:
+        return get_next(self._records, self._dates, day, n)
+
+    def previous(self, day: date, n: int) -> list[HolidayRecord]:
+        return get_previous(self._records, self._dates, day, n)
+
+    def find(
+        self,
+        apiFilter: HolidayFilter,
+        start: date | None = None,
+        end: date | None = None,
+        after: tuple[date, int] | None = None,
+        limit: int | None = None,
+    ) -> list[HolidayRecord]:
+        lo = 0 if start is None else bisect_left(self._dates, start)
+        hi = len(self._dates) if end is None else bisect_right(self._dates, end)
+
+        if after is not None:
+            after_date, after_id = after
+            position = bisect_left(self._dates, after_date)
+            while (
+                position < hi
+                and self._dates[position] == after_date
+                and self._records[position].id <= after_id
+            ):
+                position += 1
+            lo = max(lo, position)
+
+        predicate = _get_predicate(apiFilter)
+        if predicate is None:
+            hi = hi if limit is None else min(hi, lo + limit)
+            return self._records[lo:hi]
+
+        records = filter(predicate, islice(self._records, lo, hi))
+        return list(islice(records, limit))
+
+    def find_by_year_month(
+        self,
+        apiFilter: HolidayFilter,
+        year: int,
+        month: int,
+        after: tuple[date, int] | None = None,
+        limit: int | None = None,
+    ) -> list[HolidayRecord]:
+        if year < 1 or not 1 <= month <= 12:
+            return []
+        return self.find(
+            apiFilter,
+            date(year, month, 1),
+            date(year, month, monthrange(year, month)[1]),
+            after=after,
+            limit=limit,
+        )
+
+
+holiday_index = HolidayIndex()
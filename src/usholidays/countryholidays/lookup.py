@@ -0,0 +1,201 @@
+from collections.abc import Iterable, Sequence
+from datetime import date
+from itertools import repeat
+from json.encoder import encode_basestring
+from operator import add, mul
+
+from countryholidays.index import (
+    HolidayIndex,
+    HolidayRecord,
+    holiday_index,
+)
+from core.config import settings
+from core.utils import us_states
+
+
+STATE_INDEXES = {state_name: i for i, state_name in enumerate(us_states)}
+STATES_COUNT = len(us_states)
+# день в бинарном запросе — число дней с 1970-01-01, как date32 в Arrow
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+# ненулевой байт ячейки превращается в 1
+FLAGS_TABLE = bytes([0] + [1] * 255)
+FLAGS_JSON = (b"false", b"true")
+
+
+def encode_flags(flags: bytes) -> bytes:
+    return b"[" + b",".join(map(FLAGS_JSON.__getitem__, flags)) + b"]"
+
+
+class HolidayMatrix:
+    """
+    Матрица дата × штат по индексу праздников: байт ячейки — число
+    праздников штата в этот день, для ячеек с праздниками хранятся
+    их имена, уже закодированные в JSON. Плотная часть покрывает годы
+    от первого до последнего праздника внутри years; праздники вне
+    years хранятся только в словарях имён, так что одна дата вроде
+    9999-12-31 не растягивает матрицу на тысячи лет. Пакет пар
+    (дата, штат) проверяется цепочкой map по массивам без
+    интерпретации на каждую пару. Матрица строится при первом запросе
+    и обновляется по изменённым записям индекса
+    """
+
+    def __init__(self, index: HolidayIndex, years: range):
+        self.index = index
+        self.years = years
+        self.built = False
+        self.first_ordinal = 0
+        self.rows = 0
+        self._cells = bytearray()
+        # номер ячейки считается от first_ordinal и для дат вне плотной части
+        self._names: dict[int, list[tuple[int, str]]] = {}
+        self._encoded_names: dict[int, bytes] = {}
+        index.add_listener(self.on_index_change)
+
+    def on_index_change(self, old: HolidayRecord | None, new: HolidayRecord | None):
+        if old is None and new is None:
+            self.clear()
+            return
+        if not self.built:
+            return
+        if (
+            new is not None
+            and new.date.year in self.years
+            and not self._covers(new.date)
+        ):
+            # новый год за границами плотной части: она перестраивается целиком
+            self.clear()
+            return
+        if old is not None:
+            self._remove(old)
+        if new is not None:
+            self._add(new)
+
+    def _covers(self, holiday_date: date) -> bool:
+        return 0 <= holiday_date.toordinal() - self.first_ordinal < self.rows
+
+    def _get_record_cells(self, record: HolidayRecord) -> list[int]:
+        row = (record.date.toordinal() - self.first_ordinal) * STATES_COUNT
+        # биты маски идут в порядке us_states, как и штаты в строке матрицы
+        cells = []
+        mask = record.mask
+        while mask:
+            low_bit = mask & -mask
+            cells.append(row + low_bit.bit_length() - 1)
+            mask ^= low_bit
+        return cells
+
+    def _update_names(self, cell: int):
+        names = self._names.get(cell)
+        if not names:
+            self._names.pop(cell, None)
+            self._encoded_names.pop(cell, None)
+            if 0 <= cell < len(self._cells):
+                self._cells[cell] = 0
+            return
+        if 0 <= cell < len(self._cells):
+            self._cells[cell] = min(len(names), 255)
+        self._encoded_names[cell] = encode_basestring(
+            "; ".join(name for _, name in names)
+        ).encode()
+
+    def _add(self, record: HolidayRecord):
+        for cell in self._get_record_cells(record):
+            names = self._names.setdefault(cell, [])
+            names.append((record.id, record.name))
+            names.sort()
+            self._update_names(cell)
+
+    def _remove(self, record: HolidayRecord):
+        for cell in self._get_record_cells(record):
+            names = self._names.get(cell, [])
+            if (record.id, record.name) in names:
+                names.remove((record.id, record.name))
+            self._update_names(cell)
+
+    def build(self):
+        records = self.index.between(date.min, date.max)
+        self.clear()
+        years = [
+            record.date.year for record in records if record.date.year in self.years
+        ]
+        if years:
+            first_ordinal = date(years[0], 1, 1).toordinal()
+            last_ordinal = date(years[-1], 12, 31).toordinal()
+            self.first_ordinal = first_ordinal
+            self.rows = last_ordinal - first_ordinal + 1
+            self._cells = bytearray(self.rows * STATES_COUNT)
+        # записи идут по (date, id), так что имена ячейки уже упорядочены
+        for record in records:
+            for cell in self._get_record_cells(record):
+                self._names.setdefault(cell, []).append((record.id, record.name))
+        for cell in self._names:
+            self._update_names(cell)
+        self.built = True
+
+    def ensure_built(self):
+        if not self.built:
+            self.build()
+
+    def clear(self):
+        self.built = False
+        self.first_ordinal = 0
+        self.rows = 0
+        self._cells = bytearray()
+        self._names = {}
+        self._encoded_names = {}
+
+    def _get_count(self, cell: int) -> int:
+        if 0 <= cell < len(self._cells):
+            return self._cells[cell]
+        return 1 if cell in self._encoded_names else 0
+
+    def get_cells(
+        self, days: Sequence[int], state_indexes: Sequence[int], origin: int = 0
+    ) -> tuple[Iterable[int], bool]:
+        """
+        Номера ячеек пар; день — порядковый номер даты, отсчитанный от
+        origin. Второе значение — все ли пары в плотной части матрицы
+        """
+        if len(days) != len(state_indexes):
+            raise ValueError("Dates and states must have the same length")
+        if not days:
+            return [], True
+        if max(state_indexes) >= STATES_COUNT:
+            raise KeyError("No such state exists in database")
+
+        shift = origin - self.first_ordinal
+        cells = map(
+            add,
+            map(mul, days, repeat(STATES_COUNT)),
+            map(add, state_indexes, repeat(shift * STATES_COUNT)),
+        )
+        return cells, min(days) + shift >= 0 and max(days) + shift < self.rows
+
+    def lookup(
+        self, days: Sequence[int], state_indexes: Sequence[int], origin: int = 0
+    ) -> bytes:
+        """
+        По байту на пару: 1 — в этот день в штате есть праздник
+        """
+        cells, dense = self.get_cells(days, state_indexes, origin)
+        get_count = self._cells.__getitem__ if dense else self._get_count
+        return bytes(map(get_count, cells)).translate(FLAGS_TABLE)
+
+    def lookup_names(
+        self, days: Sequence[int], state_indexes: Sequence[int], origin: int = 0
+    ) -> bytes:
+        """
+        JSON массив имён праздников пар, null — праздника нет
+        """
+        cells, _ = self.get_cells(days, state_indexes, origin)
+        return (
+            b"["
+            + b",".join(map(self._encoded_names.get, cells, repeat(b"null")))
+            + b"]"
+        )
+
+
+holiday_matrix = HolidayMatrix(
+    holiday_index,
+    range(settings.HOLIDAYS_LOOKUP_YEAR_START, settings.HOLIDAYS_LOOKUP_YEAR_END + 1),
+)
@@ -1,9 +1,11 @@
 __all__ = (
+    "DatasetVersion",
     "Holiday",
     "HolidayState",
     "State",
 )
 
+from countryholidays.models.datasetversion import DatasetVersion
 from countryholidays.models.holiday import Holiday
 from countryholidays.models.holidaystate import HolidayState
 from countryholidays.models.state import State
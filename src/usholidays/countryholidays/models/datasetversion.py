@@ -0,0 +1,15 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import BigInteger
+
+from core.models import Base
+
+
+class DatasetVersion(Base):
+    """
+    Единственная строка с номером версии данных о праздниках,
+    увеличивается в транзакции каждого изменения
+    """
+
+    __tablename__ = "dataset_versions"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger)
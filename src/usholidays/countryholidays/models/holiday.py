@@ -1,7 +1,7 @@
 from sqlalchemy.orm import Mapped, relationship, mapped_column
-from sqlalchemy import Boolean, String
+from sqlalchemy import Boolean, Index, PrimaryKeyConstraint, String
 
-from datetime import date
+import datetime
 from typing import TYPE_CHECKING, List
 
 from core.models import Base, HolidayTypeEnum
@@ -12,14 +12,28 @@ if TYPE_CHECKING:
 
 class Holiday(Base):
     __tablename__ = "holidays"
-    id: Mapped[int] = mapped_column(primary_key=True)
-    name: Mapped[str]
-    date: Mapped[date]
+    # секции по годам даты; первичный ключ секционированной таблицы
+    # обязан включать дату. Уникальный индекс по одному id в ней
+    # невозможен: id выдаёт только sequence holidays_id_seq, а загрузка
+    # с явными id (countryholidays.synthetic) продолжает его и сдвигает sequence
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "date"),
+        # (date, id) — порядок выдачи списков и ключ курсора пагинации
+        Index("ix_holidays_date_id", "date", "id"),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
+    # праздник по-прежнему определяется одним id
+    __mapper_args__ = {"primary_key": ["id"]}
+    id: Mapped[int] = mapped_column(autoincrement=True)
+    name: Mapped[str] = mapped_column(index=True)
+    date: Mapped[datetime.date]
     custom: Mapped[bool] = mapped_column(Boolean, default=False, server_default="False")
     type: Mapped["HolidayTypeEnum"] = mapped_column(String)
 
+    # штаты в порядке us_states, как в индексе и выгрузке
     states: Mapped[List["HolidayState"]] = relationship(
         back_populates="holiday",
+        order_by="HolidayState.state_id",
         # secondary="holidays_states",
         cascade="all, delete-orphan",
     )
@@ -1,6 +1,8 @@
 from sqlalchemy.orm import Mapped, relationship, mapped_column
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, ForeignKeyConstraint, Index
 from core.models import Base
+
+import datetime
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -10,14 +12,19 @@ if TYPE_CHECKING:
 
 class HolidayState(Base):
     __tablename__ = "holidays_states"
-    holiday_id: Mapped[int] = mapped_column(
-        ForeignKey(
-            "holidays.id",
-            # ondelete="CASCADE",
-            # onupdate="cascade",
+    __table_args__ = (
+        Index("ix_holidays_states_state_id_holiday_id", "state_id", "holiday_id"),
+        # первичный ключ секционированной holidays — (id, date), поэтому
+        # связь хранит и дату праздника; перенос праздника на другую
+        # дату и его удаление доходят до штатов каскадом в базе
+        ForeignKeyConstraint(
+            ["holiday_id", "holiday_date"],
+            ["holidays.id", "holidays.date"],
+            ondelete="CASCADE",
+            onupdate="CASCADE",
         ),
-        primary_key=True,
     )
+    holiday_id: Mapped[int] = mapped_column(primary_key=True)
     state_id: Mapped[int] = mapped_column(
         ForeignKey(
             "states.id",
@@ -26,6 +33,7 @@ class HolidayState(Base):
         ),
         primary_key=True,
     )
+    holiday_date: Mapped[datetime.date]
 
     holiday: Mapped["Holiday"] = relationship(back_populates="states")
     state: Mapped["State"] = relationship(back_populates="holidays")
@@ -0,0 +1,104 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date
+
+from countryholidays.index import (
+    HolidayIndex,
+    HolidayRecord,
+    get_next,
+    get_previous,
+    holiday_index,
+)
+from core.utils import us_states
+
+
+class StateHolidays:
+    """
+    Праздники каждого штата в порядке (date, id) с параллельным массивом
+    дат: ближайшие к дате праздники находятся бинарным поиском за
+    O(log n) независимо от размера таблицы. Массивы строятся из индекса
+    при первом запросе и обновляются по изменённым в нём записям
+    """
+
+    def __init__(self, index: HolidayIndex):
+        self.index = index
+        self.built = False
+        self._records: dict[str, list[HolidayRecord]] = {}
+        self._dates: dict[str, list[date]] = {}
+        index.add_listener(self.on_index_change)
+
+    def on_index_change(self, old: HolidayRecord | None, new: HolidayRecord | None):
+        if old is None and new is None:
+            self.clear()
+            return
+        if not self.built:
+            return
+        if old is not None:
+            self._remove(old)
+        if new is not None:
+            self._insert(new)
+
+    def _get_state_names(self, record: HolidayRecord) -> list[str]:
+        return [holiday_state.state.name for holiday_state in record.states]
+
+    def _insert(self, record: HolidayRecord):
+        for state_name in self._get_state_names(record):
+            records = self._records.setdefault(state_name, [])
+            dates = self._dates.setdefault(state_name, [])
+            position = bisect_right(dates, record.date)
+            # среди праздников с той же датой порядок задаётся id
+            while (
+                position > 0
+                and dates[position - 1] == record.date
+                and records[position - 1].id > record.id
+            ):
+                position -= 1
+            records.insert(position, record)
+            dates.insert(position, record.date)
+
+    def _remove(self, record: HolidayRecord):
+        for state_name in self._get_state_names(record):
+            records = self._records.get(state_name, [])
+            dates = self._dates.get(state_name, [])
+            position = bisect_left(dates, record.date)
+            while position < len(records) and records[position].id != record.id:
+                position += 1
+            if position < len(records):
+                del records[position]
+                del dates[position]
+
+    def build(self):
+        records_by_state: dict[str, list[HolidayRecord]] = defaultdict(list)
+        for record in self.index.between(date.min, date.max):
+            for state_name in self._get_state_names(record):
+                records_by_state[state_name].append(record)
+
+        self._records = dict(records_by_state)
+        self._dates = {
+            state_name: [record.date for record in records]
+            for state_name, records in self._records.items()
+        }
+        self.built = True
+
+    def ensure_built(self):
+        if not self.built:
+            self.build()
+
+    def clear(self):
+        self.built = False
+        self._records = {}
+        self._dates = {}
+
+    def _get_arrays(self, state_name: str) -> tuple[list[HolidayRecord], list[date]]:
+        if state_name not in us_states:
+            raise KeyError(state_name)
+        return self._records.get(state_name, []), self._dates.get(state_name, [])
+
+    def next(self, state_name: str, day: date, n: int) -> list[HolidayRecord]:
+        return get_next(*self._get_arrays(state_name), day, n)
+
+    def previous(self, state_name: str, day: date, n: int) -> list[HolidayRecord]:
+        return get_previous(*self._get_arrays(state_name), day, n)
+
+
+state_holidays = StateHolidays(holiday_index)
@@ -0,0 +1,92 @@
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+from sqlalchemy import text
+
+from collections.abc import Iterable
+import re
+
+
+PARTITION_NAME = re.compile(r"^holidays_y(\d+)$")
+# ключ pg_advisory_xact_lock, под которым создаются секции
+PARTITIONS_LOCK_KEY = 0x686F6C73
+
+
+def get_partition_name(year: int) -> str:
+    return f"holidays_y{year}"
+
+
+async def get_partition_years(connection: AsyncConnection | AsyncSession) -> set[int]:
+    partition_names = await connection.scalars(
+        text(
+            "SELECT relname FROM pg_inherits "
+            "JOIN pg_class ON pg_class.oid = pg_inherits.inhrelid "
+            "WHERE inhparent = 'holidays'::regclass"
+        )
+    )
+    return {
+        int(match.group(1))
+        for partition_name in partition_names
+        if (match := PARTITION_NAME.match(partition_name)) is not None
+    }
+
+
+class HolidayPartitions:
+    """
+    holidays разбита на секции по годам. Секции заранее создаются
+    миграцией и при старте приложения, недостающая создаётся перед
+    первой записью праздника с такой датой. Существующие годы
+    запоминаются, и запись в них обходится без запросов
+    """
+
+    def __init__(self, lock_timeout: str = "5s"):
+        self.lock_timeout = lock_timeout
+        self._years: set[int] = set()
+
+    def clear(self):
+        self._years = set()
+
+    async def ensure(self, session: AsyncSession, years: Iterable[int]):
+        missing = set(years) - self._years
+        if not missing:
+            return
+
+        existing = await get_partition_years(session)
+        if not missing <= existing:
+            connection = await session.connection()
+            await self._create(connection.engine, missing - existing)
+            existing |= missing
+        self._years |= existing
+
+    async def _create(self, engine: AsyncEngine, years: set[int]):
+        """
+        Секция создаётся отдельной таблицей и присоединяется ATTACH
+        PARTITION в своей короткой транзакции: ATTACH берёт на holidays
+        SHARE UPDATE EXCLUSIVE и не ждёт читающих, а откат транзакции
+        запроса не убирает уже запомненную секцию
+        """
+        async with engine.begin() as connection:
+            await connection.execute(
+                text(f"SET LOCAL lock_timeout = '{self.lock_timeout}'")
+            )
+            # параллельные процессы создают секции по очереди
+            await connection.execute(
+                text("SELECT pg_advisory_xact_lock(:key)"),
+                {"key": PARTITIONS_LOCK_KEY},
+            )
+            existing = await get_partition_years(connection)
+            for year in sorted(years - existing):
+                partition_name = get_partition_name(year)
+                await connection.execute(
+                    text(
+                        f"CREATE TABLE {partition_name} "
+                        f"(LIKE holidays INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+                    )
+                )
+                await connection.execute(
+                    text(
+                        f"ALTER TABLE holidays ATTACH PARTITION {partition_name} "
+                        f"FOR VALUES FROM ('{year:04}-01-01') TO ('{year + 1:04}-01-01')"
+                    )
+                )
+
+
+holiday_partitions = HolidayPartitions()
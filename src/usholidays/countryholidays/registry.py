@@ -0,0 +1,83 @@
+from fastapi import HTTPException, status
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.orm import make_transient_to_detached
+
+from asyncio import Lock
+from collections.abc import Iterable
+
+from countryholidays.models import State
+
+
+class StateRegistry:
+    """
+    Таблица states неизменна, поэтому загружается один раз.
+    Хранятся отсоединённые объекты State: в сессию запроса они
+    добавляются через merge(load=False), который не обращается к базе
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._lock = Lock()
+        self._by_name: dict[str, State] = {}
+        self._names_by_id: dict[int, str] = {}
+
+    async def load(self, session: AsyncSession):
+        states_result = await session.execute(select(State.id, State.name))
+        states = []
+        for id, name in states_result:
+            state = State(id=id, name=name)
+            make_transient_to_detached(state)
+            states.append(state)
+
+        self._by_name = {state.name: state for state in states}
+        self._names_by_id = {state.id: state.name for state in states}
+        self.loaded = True
+
+    async def ensure_loaded(self, session: AsyncSession):
+        if self.loaded:
+            return
+        async with self._lock:
+            if not self.loaded:
+                await self.load(session)
+
+    def clear(self):
+        self.loaded = False
+        self._by_name = {}
+        self._names_by_id = {}
+
+    def get_name(self, id: int) -> str | None:
+        return self._names_by_id.get(id)
+
+    def get_ids(self, state_names: Iterable[str]) -> list[int]:
+        """
+        id известных штатов без повторов; неизвестные имена пропускаются
+        """
+        return sorted(
+            {
+                self._by_name[state_name].id
+                for state_name in state_names
+                if state_name in self._by_name
+            }
+        )
+
+    async def get_states(
+        self, session: AsyncSession, state_names: Iterable[str]
+    ) -> list[State]:
+        await self.ensure_loaded(session)
+        states = [
+            await session.merge(self._by_name[state_name], load=False)
+            for state_name in dict.fromkeys(state_names)
+            if state_name in self._by_name
+        ]
+        if len(states) == 0:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No such state exists in database",
+            )
+
+        return states
+
+
+state_registry = StateRegistry()
@@ -26,6 +26,37 @@ class HolidayUpdateSchema(HolidayCreateSchema):
     pass
 
 
+class HolidayBulkConflictSchema(BaseModel):
+    index: int
+    name: str
+    detail: str
+
+
+class HolidayBulkResultSchema(BaseModel):
+    created: list[int]
+    conflicts: list[HolidayBulkConflictSchema]
+
+
+class BusinessDaysSchema(BaseModel):
+    state: str
+    start: date
+    end: date
+    business_days: int
+
+
+class BusinessDaysOffsetSchema(BaseModel):
+    state: str
+    start: date
+    days: int
+    date: date
+
+
+class HolidayLookupSchema(BaseModel):
+    dates: list[date]
+    states: list[str]
+    names: bool = False
+
+
 class HolidaySchema(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     name: str
@@ -0,0 +1,399 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, insert, select, tuple_, update
+
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from time import perf_counter
+import asyncio
+import multiprocessing
+import os
+import re
+
+from countryholidays.models import Holiday, HolidayState, State
+from countryholidays.partitions import holiday_partitions
+from countryholidays.version import dataset_version
+from core.models import HolidayTypeEnum
+from core.config import settings
+from core.utils import (
+    get_national_holidays_names,
+    get_state_holidays,
+    us_states,
+)
+
+
+HOLIDAY_NAME_DELIMITERS = re.compile(r"[&/;]")
+
+
+@dataclass
+class SeedReport:
+    holidays: int = 0
+    holidays_states: int = 0
+    timings: dict[str, float] = field(default_factory=dict)
+
+    def __str__(self) -> str:
+        phases = ", ".join(
+            f"{phase}={seconds * 1000:.1f}ms" for phase, seconds in self.timings.items()
+        )
+        return (
+            f"Seeded {self.holidays} holidays and "
+            f"{self.holidays_states} holiday states ({phases})"
+        )
+
+
+@dataclass
+class ResyncReport:
+    inserted: list[tuple[str, date]] = field(default_factory=list)
+    deleted: list[tuple[str, date]] = field(default_factory=list)
+    retyped: list[tuple[str, date]] = field(default_factory=list)
+    states_added: int = 0
+    states_removed: int = 0
+    timings: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def changed(self) -> bool:
+        return bool(
+            self.inserted
+            or self.deleted
+            or self.retyped
+            or self.states_added
+            or self.states_removed
+        )
+
+    def __str__(self) -> str:
+        phases = ", ".join(
+            f"{phase}={seconds * 1000:.1f}ms" for phase, seconds in self.timings.items()
+        )
+        return (
+            f"Resynced holidays: {len(self.inserted)} inserted, "
+            f"{len(self.deleted)} deleted, {len(self.retyped)} retyped, "
+            f"{self.states_added} holiday states added, "
+            f"{self.states_removed} removed ({phases})"
+        )
+
+
+class _PhaseTimer:
+    def __init__(self, report: SeedReport | ResyncReport):
+        self.report = report
+        self.started = perf_counter()
+
+    def __call__(self, phase: str):
+        finished = perf_counter()
+        self.report.timings[phase] = finished - self.started
+        self.started = finished
+
+
+def split_holiday_name(holiday_name: str) -> list[str]:
+    """
+    Иногда могут попадаться названия вроде Martin King & St. Jeff Day
+    это два разных праздника, но могут отмечаться в один день в штате,
+    поэтому их надо разделить
+    """
+    return [name.strip() for name in HOLIDAY_NAME_DELIMITERS.split(holiday_name)]
+
+
+def build_seed_rows(
+    state_holidays: Iterable[tuple[str, Iterable[tuple[date, str]]]],
+) -> tuple[list[tuple[str, date, HolidayTypeEnum]], list[tuple[int, int]]]:
+    """
+    Собирает праздники в виде кортежей (name, date, type) и связи
+    (номер праздника, номер штата в us_states). Праздник с одним
+    именем и датой в разных штатах — одна строка
+    """
+    state_numbers = {state_name: i for i, state_name in enumerate(us_states)}
+    holiday_numbers: dict[tuple[str, date], int] = {}
+    holiday_rows: list[tuple[str, date, HolidayTypeEnum]] = []
+    holiday_states: list[tuple[int, int]] = []
+
+    for state_name, holidays_by_date in state_holidays:
+        state_number = state_numbers[state_name]
+        for holiday_date, holiday_name in holidays_by_date:
+            for name in split_holiday_name(holiday_name):
+                holiday_number = holiday_numbers.get((name, holiday_date))
+                if holiday_number is None:
+                    holiday_number = len(holiday_rows)
+                    holiday_numbers[(name, holiday_date)] = holiday_number
+                    holiday_rows.append(
+                        (
+                            name,
+                            holiday_date,
+                            HolidayTypeEnum.national
+                            if name in get_national_holidays_names(holiday_date.year)
+                            else HolidayTypeEnum.local,
+                        )
+                    )
+                holiday_states.append((holiday_number, state_number))
+
+    return holiday_rows, list(dict.fromkeys(holiday_states))
+
+
+async def compute_state_holidays(
+    years: Iterable[int], workers: int | None = None
+) -> list[tuple[str, list[tuple[date, str]]]]:
+    """
+    Праздники каждой пары (штат, год) считаются библиотекой holidays
+    в пуле процессов, результат упорядочен по штатам и годам
+    """
+    pairs = [(state_name, year) for state_name in us_states for year in years]
+    workers = workers or os.cpu_count() or 1
+    # один год считается быстрее, чем запускаются процессы пула
+    if workers == 1 or len(pairs) <= len(us_states):
+        return [get_state_holidays(state_name, year) for state_name, year in pairs]
+
+    state_names, state_years = zip(*pairs)
+    # пары передаются пачками, чтобы накладные расходы на обмен
+    # с процессами не превышали время расчёта
+    chunksize = -(-len(pairs) // (workers * 4))
+    # fork из процесса с потоками небезопасен, поэтому процессы запускаются заново
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        return await asyncio.to_thread(
+            lambda: list(
+                executor.map(
+                    get_state_holidays, state_names, state_years, chunksize=chunksize
+                )
+            )
+        )
+
+
+async def copy_records(
+    session: AsyncSession,
+    table_name: str,
+    columns: list[str],
+    records: Iterable[tuple],
+):
+    """
+    COPY через соединение asyncpg внутри текущей транзакции сессии
+    """
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(  # type: ignore
+        table_name, records=records, columns=columns
+    )
+
+
+async def write_seed_rows(
+    session: AsyncSession,
+    holiday_rows: list[tuple[str, date, HolidayTypeEnum]],
+    holiday_states: list[tuple[int, int]],
+    state_ids: list[int],
+    timer: _PhaseTimer,
+):
+    holiday_ids = list(
+        await session.scalars(
+            insert(Holiday).returning(Holiday.id, sort_by_parameter_order=True),
+            [
+                {"name": name, "date": holiday_date, "type": holiday_type}
+                for name, holiday_date, holiday_type in holiday_rows
+            ],
+        )
+    )
+    timer("write_holidays")
+
+    await copy_records(
+        session,
+        HolidayState.__tablename__,
+        ["holiday_id", "holiday_date", "state_id"],
+        (
+            (
+                holiday_ids[holiday_number],
+                holiday_rows[holiday_number][1],
+                state_ids[state_number],
+            )
+            for holiday_number, state_number in holiday_states
+        ),
+    )
+    timer("write_holidays_states")
+
+    timer.report.holidays += len(holiday_ids)
+    timer.report.holidays_states += len(holiday_states)
+
+
+async def populate_db(session: AsyncSession) -> SeedReport | None:
+    table_exists = await session.execute(select(1).select_from(Holiday).limit(1))
+    if table_exists.scalar():
+        return None
+
+    report = SeedReport()
+    timer = _PhaseTimer(report)
+
+    state_holidays = await compute_state_holidays(
+        range(settings.SEED_YEAR_START, settings.SEED_YEAR_END + 1),
+        settings.SEED_WORKERS,
+    )
+    timer("compute")
+
+    holiday_rows, holiday_states = build_seed_rows(state_holidays)
+    timer("build")
+
+    state_ids = list(
+        await session.scalars(
+            insert(State).returning(State.id, sort_by_parameter_order=True),
+            [{"name": state_name} for state_name in us_states],
+        )
+    )
+    timer("write_states")
+
+    await holiday_partitions.ensure(
+        session, {holiday_date.year for _, holiday_date, _ in holiday_rows}
+    )
+    timer("write_partitions")
+
+    await write_seed_rows(session, holiday_rows, holiday_states, state_ids, timer)
+
+    await dataset_version.bump(session)
+    await session.commit()
+    timer("commit")
+    return report
+
+
+async def resync_db(
+    session: AsyncSession, years: Iterable[int] | None = None
+) -> ResyncReport:
+    """
+    Приводит не пользовательские праздники за годы years к текущему
+    ответу библиотеки holidays. Праздник определяется именем и датой:
+    переименованный или перенесённый праздник удаляется и добавляется
+    заново, у остальных меняются только тип и штаты. Пользовательские
+    праздники не трогаются, совпадающий с ними праздник библиотеки не
+    добавляется. Все изменения применяются одной транзакцией
+    """
+    years = sorted(
+        range(settings.SEED_YEAR_START, settings.SEED_YEAR_END + 1)
+        if years is None
+        else years
+    )
+    report = ResyncReport()
+    timer = _PhaseTimer(report)
+    if not years:
+        return report
+
+    state_holidays = await compute_state_holidays(years, settings.SEED_WORKERS)
+    holiday_rows, holiday_states = build_seed_rows(state_holidays)
+    expected: dict[tuple[str, date], tuple[HolidayTypeEnum, set[str]]] = {
+        (name, holiday_date): (holiday_type, set())
+        for name, holiday_date, holiday_type in holiday_rows
+    }
+    for holiday_number, state_number in holiday_states:
+        name, holiday_date, _ = holiday_rows[holiday_number]
+        expected[(name, holiday_date)][1].add(us_states[state_number])
+    timer("compute")
+
+    state_ids = dict(
+        (await session.execute(select(State.name, State.id))).tuples().all()
+    )
+    current: dict[tuple[str, date], tuple[int, str, set[str]]] = {}
+    duplicates: dict[int, tuple[str, date]] = {}
+    custom_keys: set[tuple[str, date]] = set()
+    result = await session.execute(
+        select(
+            Holiday.id,
+            Holiday.name,
+            Holiday.date,
+            Holiday.custom,
+            Holiday.type,
+            State.name,
+        )
+        .select_from(Holiday)
+        .outerjoin(HolidayState)
+        .outerjoin(State)
+        .where(
+            Holiday.date >= date(years[0], 1, 1),
+            Holiday.date < date(years[-1] + 1, 1, 1),
+        )
+    )
+    for id, name, holiday_date, custom, holiday_type, state_name in result:
+        key = (name, holiday_date)
+        if custom:
+            custom_keys.add(key)
+            continue
+        if key not in current:
+            current[key] = (id, holiday_type, set())
+        elif current[key][0] != id:
+            # лишние копии праздника удаляются
+            duplicates[id] = key
+            continue
+        if state_name is not None:
+            current[key][2].add(state_name)
+    timer("read")
+
+    report.deleted.extend(duplicates.values())
+    deleted_ids = list(duplicates)
+    retyped: dict[HolidayTypeEnum, list[int]] = {}
+    states_added: list[tuple[int, date, int]] = []
+    states_removed: list[tuple[int, int]] = []
+    for key, (id, holiday_type, state_names) in current.items():
+        if key not in expected or key in custom_keys:
+            report.deleted.append(key)
+            deleted_ids.append(id)
+            continue
+        expected_type, expected_state_names = expected[key]
+        if holiday_type != expected_type.value:
+            report.retyped.append(key)
+            retyped.setdefault(expected_type, []).append(id)
+        states_added.extend(
+            (id, key[1], state_ids[state_name])
+            for state_name in sorted(expected_state_names - state_names)
+        )
+        states_removed.extend(
+            (id, state_ids[state_name])
+            for state_name in sorted(state_names - expected_state_names)
+        )
+    report.inserted = [
+        key for key in expected if key not in current and key not in custom_keys
+    ]
+    report.states_added = len(states_added)
+    report.states_removed = len(states_removed)
+    timer("diff")
+
+    if not report.changed:
+        return report
+
+    await holiday_partitions.ensure(
+        session, {holiday_date.year for _, holiday_date in report.inserted}
+    )
+    if deleted_ids:
+        # связи со штатами удаляются каскадом внешнего ключа
+        await session.execute(delete(Holiday).where(Holiday.id.in_(deleted_ids)))
+    for holiday_type, ids in retyped.items():
+        await session.execute(
+            update(Holiday).where(Holiday.id.in_(ids)).values(type=holiday_type)
+        )
+    if states_removed:
+        await session.execute(
+            delete(HolidayState).where(
+                tuple_(HolidayState.holiday_id, HolidayState.state_id).in_(
+                    states_removed
+                )
+            )
+        )
+    if report.inserted:
+        inserted_ids = list(
+            await session.scalars(
+                insert(Holiday).returning(Holiday.id, sort_by_parameter_order=True),
+                [
+                    {"name": key[0], "date": key[1], "type": expected[key][0]}
+                    for key in report.inserted
+                ],
+            )
+        )
+        states_added.extend(
+            (id, key[1], state_ids[state_name])
+            for id, key in zip(inserted_ids, report.inserted)
+            for state_name in sorted(expected[key][1])
+        )
+    if states_added:
+        await copy_records(
+            session,
+            HolidayState.__tablename__,
+            ["holiday_id", "holiday_date", "state_id"],
+            states_added,
+        )
+    timer("write")
+
+    await dataset_version.bump(session)
+    await session.commit()
+    timer("commit")
+    return report
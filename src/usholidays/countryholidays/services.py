@@ -1,73 +1,508 @@
 from fastapi import HTTPException, status
 
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy import func, insert, select, Select
+from sqlalchemy.orm import subqueryload
 
+from array import array
+from collections.abc import AsyncIterator, Sequence
 from datetime import date
+import sys
+from pathlib import Path
 
 from countryholidays.schemas import (
+    HolidayBulkConflictSchema,
+    HolidayBulkResultSchema,
     HolidayCreateSchema,
     HolidayUpdateSchema,
 )
 from countryholidays.utils import (
     HolidayFilter,
+    decode_cursor,
     get_holiday_by_id,
-    get_query_between_dates,
-    get_query_by_year_month,
-    get_states_by_names,
+    get_query_after,
+    get_query_by_period,
+    has_state_filter,
 )
 from countryholidays.models import Holiday, HolidayState, State
+from countryholidays.cache import holidays_cache, get_holidays_cache_key
+from countryholidays.index import (
+    STATE_BITS,
+    HolidayRecord,
+    get_states_mask,
+    holiday_index,
+)
+from countryholidays.businessdays import BusinessCalendar, business_calendar
+from countryholidays.export import ExportFormatEnum, stream_holidays
+from countryholidays.nearest import state_holidays
+from countryholidays.lookup import (
+    EPOCH_ORDINAL,
+    STATE_INDEXES,
+    encode_flags,
+    holiday_matrix,
+)
+from countryholidays.partitions import holiday_partitions
+from countryholidays.registry import state_registry
+from countryholidays.snapshots import snapshot_store
+from countryholidays.version import dataset_version, make_etag
 from core.models.base import HolidayTypeEnum
+from core.config import settings
 
 
-async def get_holidays_service(
-    session: AsyncSession,
+# изменения других процессов сбрасывают кэш и индекс, а через индекс — снимки
+dataset_version.add_listener(holidays_cache.invalidate)
+dataset_version.add_listener(holiday_index.clear)
+
+
+def get_holidays_stmt(
+    apiFilter: HolidayFilter,
+    year: str | None = None,
+    month: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    after: tuple[date, int] | None = None,
+    limit: int | None = None,
+) -> Select:
+    stmt = select(Holiday).order_by(Holiday.date, Holiday.id)
+    # штаты присоединяются только для фильтрации по ним,
+    # иначе join заставляет читать всю holidays_states
+    if has_state_filter(apiFilter):
+        stmt = stmt.outerjoin(HolidayState).outerjoin(State).distinct()
+    if after is not None:
+        stmt = get_query_after(stmt, after)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    stmt = get_query_by_period(stmt, year, month, start, end)
+    return apiFilter.filter(
+        stmt.options(subqueryload(Holiday.states).joinedload(HolidayState.state))
+    )
+
+
+def get_holidays_export_stmt(
     apiFilter: HolidayFilter,
     year: str | None = None,
     month: str | None = None,
     start: date | None = None,
     end: date | None = None,
-) -> list[Holiday]:
+) -> Select:
     """
-    Запрос может включать только год и месяц, либо только период,
-    либо ничего из первых вариантов. Дополнительные фильтры будут
-    применены к любому из вышеперечисленных вариантов. В последнем
-    случае фильтрация произойдёт по всей таблице
+    Плоские строки (id, name, date, state) в порядке (date, id, state_id):
+    строки одного праздника идут подряд и не требуют сборки объектов
+    """
+    stmt = get_query_by_period(
+        select(Holiday.id, Holiday.name, Holiday.date, State.name)
+        .select_from(Holiday)
+        .outerjoin(HolidayState)
+        .outerjoin(State)
+        .order_by(Holiday.date, Holiday.id, HolidayState.state_id),
+        year,
+        month,
+        start,
+        end,
+    )
+    if not has_state_filter(apiFilter):
+        return apiFilter.filter(stmt)
+
+    # фильтр по штатам выбирает праздники, но в выгрузку идут все их штаты
+    return stmt.where(
+        Holiday.id.in_(get_filtered_holidays_ids(apiFilter, year, month, start, end))
+    )
+
+
+def get_filtered_holidays_ids(
+    apiFilter: HolidayFilter,
+    year: str | None = None,
+    month: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+) -> Select:
+    return apiFilter.filter(
+        get_query_by_period(
+            select(Holiday.id).select_from(Holiday).join(HolidayState).join(State),
+            year,
+            month,
+            start,
+            end,
+        )
+    )
+
+
+def get_holidays_aggregate_stmt(
+    apiFilter: HolidayFilter,
+    year: str | None = None,
+    month: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    after: tuple[date, int] | None = None,
+    limit: int | None = None,
+) -> Select:
+    """
+    Одна строка на праздник, имена штатов собирает array_agg
+    в коррелированном подзапросе: список читается за один запрос
+    без размножения строк join-ом
+    """
+    states_names = (
+        select(func.array_agg(State.name))
+        .select_from(HolidayState)
+        .join(State)
+        .where(HolidayState.holiday_id == Holiday.id)
+        .scalar_subquery()
+    )
+    stmt = get_query_by_period(
+        select(
+            Holiday.id,
+            Holiday.name,
+            Holiday.date,
+            Holiday.custom,
+            Holiday.type,
+            states_names,
+        ).order_by(Holiday.date, Holiday.id),
+        year,
+        month,
+        start,
+        end,
+    )
+    if after is not None:
+        stmt = get_query_after(stmt, after)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    if not has_state_filter(apiFilter):
+        return apiFilter.filter(stmt)
+
+    return stmt.where(
+        Holiday.id.in_(get_filtered_holidays_ids(apiFilter, year, month, start, end))
+    )
+
+
+def get_nearest_holidays_stmt(
+    day: date, n: int, state_name: str | None = None, previous: bool = False
+) -> Select:
+    """
+    n праздников начиная с day или до него. Порядок совпадает с индексом
+    ix_holidays_date_id и с порядком секций, поэтому чтение
+    останавливается, как только набрано n строк
+    """
+    if previous:
+        stmt = select(Holiday).where(Holiday.date < day)
+        stmt = stmt.order_by(Holiday.date.desc(), Holiday.id.desc())
+    else:
+        stmt = select(Holiday).where(Holiday.date >= day)
+        stmt = stmt.order_by(Holiday.date, Holiday.id)
+    if state_name is not None:
+        stmt = stmt.where(
+            select(HolidayState.holiday_id)
+            .join(State)
+            .where(
+                HolidayState.holiday_id == Holiday.id,
+                HolidayState.holiday_date == Holiday.date,
+                State.name == state_name,
+            )
+            .exists()
+        )
+    return stmt.limit(n).options(
+        subqueryload(Holiday.states).joinedload(HolidayState.state)
+    )
+
+
+def check_period_params(
+    year: str | None = None,
+    month: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+):
+    """
+    Допустимы только год с месяцем, только начало с концом периода
+    или ни одного из этих параметров
     """
-    stmt = select(Holiday).outerjoin(HolidayState).outerjoin(State)
     option = (
         (0 if year is None else 1) * 1000
         + (0 if month is None else 1) * 100
         + (0 if start is None else 1) * 10
         + (0 if end is None else 1)
     )
-    # год и месяц
-    if option // 100 == 11 and option % 100 == 0:
-        stmt = apiFilter.filter(
-            get_query_by_year_month(stmt, int(year), int(month)).options(  # type: ignore
-                selectinload(Holiday.states).joinedload(HolidayState.state)
+    if option not in (1100, 11, 0):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Wrong path parameters"
+        )
+
+
+async def get_holidays_etag_service(
+    session: AsyncSession,
+    apiFilter: HolidayFilter,
+    year: str | None = None,
+    month: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+) -> str:
+    """
+    ETag ответа списка: версия данных и нормализованные параметры
+    запроса. Версия читается из базы не чаще раза в DATASET_VERSION_TTL
+    """
+    check_period_params(year, month, start, end)
+    after = None if cursor is None else decode_cursor(cursor)
+    await dataset_version.ensure_loaded(session)
+    return make_etag(
+        dataset_version.version,
+        get_holidays_cache_key(
+            apiFilter, year, month, start, end, limit=limit, after=after
+        ),
+    )
+
+
+async def get_holidays_service(
+    session: AsyncSession,
+    apiFilter: HolidayFilter,
+    year: str | None = None,
+    month: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+) -> list[Holiday] | list[HolidayRecord]:
+    """
+    Запрос может включать только год и месяц, либо только период,
+    либо ничего из первых вариантов. Дополнительные фильтры будут
+    применены к любому из вышеперечисленных вариантов. В последнем
+    случае фильтрация произойдёт по всей таблице.
+    Праздники упорядочены по (date, id); limit и cursor задают
+    страницу после позиции, закодированной в курсоре
+    """
+    check_period_params(year, month, start, end)
+    after = None if cursor is None else decode_cursor(cursor)
+
+    cache_key = get_holidays_cache_key(
+        apiFilter, year, month, start, end, limit=limit, after=after
+    )
+    await dataset_version.ensure_loaded(session)
+    cached_list = holidays_cache.get(cache_key)
+    if cached_list is not None:
+        return cached_list
+
+    if settings.HOLIDAYS_INDEX_ENABLED:
+        await holiday_index.ensure_loaded(session)
+        if year is not None and month is not None:
+            holiday_list = holiday_index.find_by_year_month(
+                apiFilter,
+                int(year),  # type: ignore
+                int(month),  # type: ignore
+                after=after,
+                limit=limit,
+            )
+        else:
+            holiday_list = holiday_index.find(
+                apiFilter, start, end, after=after, limit=limit
+            )
+    elif settings.HOLIDAYS_QUERY_MODE == "aggregate":
+        result = await session.execute(
+            get_holidays_aggregate_stmt(
+                apiFilter, year, month, start, end, after, limit
             )
         )
-    # старт и конец периода
-    elif option % 100 == 11 and option // 100 == 0:
-        stmt = apiFilter.filter(
-            get_query_between_dates(stmt, start, end).options(  # type: ignore
-                selectinload(Holiday.states).joinedload(HolidayState.state)
+        holiday_list = [
+            HolidayRecord(
+                id=id,
+                name=name,
+                date=holiday_date,
+                custom=custom,
+                type=HolidayTypeEnum(holiday_type),
+                mask=get_states_mask(states_names or ()),
             )
+            for id, name, holiday_date, custom, holiday_type, states_names in result
+        ]
+    else:
+        result = await session.execute(
+            get_holidays_stmt(apiFilter, year, month, start, end, after, limit)
+        )
+        holiday_list = list(result.scalars().unique().all())
+
+    holidays_cache.set(cache_key, holiday_list)
+    return holiday_list
+
+
+async def get_holidays_snapshot_service(
+    session: AsyncSession,
+    year: int,
+    state_name: str | None = None,
+    compressed: bool = False,
+) -> Path:
+    """
+    Путь к снимку праздников года (и штата), собранному из индекса
+    """
+    if state_name is not None and state_name not in STATE_BITS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No such state exists in database",
         )
-    # не был задан год и месяц либо период
-    elif option == 0:
-        stmt = apiFilter.filter(
-            stmt.options(selectinload(Holiday.states).joinedload(HolidayState.state))
+
+    await dataset_version.ensure_loaded(session)
+    await holiday_index.ensure_loaded(session)
+    path = await snapshot_store.get_path((year, state_name), compressed)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Holidays for year {year} were not found",
         )
-    else:
+
+    return path
+
+
+def export_holidays_service(
+    session_factory: async_sessionmaker[AsyncSession],
+    apiFilter: HolidayFilter,
+    year: str | None = None,
+    month: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    export_format: ExportFormatEnum = ExportFormatEnum.ndjson,
+) -> AsyncIterator[bytes]:
+    check_period_params(year, month, start, end)
+    return stream_holidays(
+        session_factory,
+        get_holidays_export_stmt(apiFilter, year, month, start, end),
+        export_format,
+    )
+
+
+async def get_business_calendar(
+    session: AsyncSession, state_name: str
+) -> BusinessCalendar:
+    if state_name not in STATE_BITS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No such state exists in database",
+        )
+
+    await dataset_version.ensure_loaded(session)
+    await holiday_index.ensure_loaded(session)
+    business_calendar.ensure_built()
+    return business_calendar
+
+
+async def get_business_days_service(
+    session: AsyncSession, state_name: str, start: date, end: date
+) -> int:
+    """
+    Число рабочих дней штата в периоде, считается по индексу без запросов
+    """
+    if end < start:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Wrong path parameters"
         )
-    result = await session.execute(stmt)
-    holiday_list = result.scalars().unique().all()
-    return list(holiday_list)
+
+    calendar = await get_business_calendar(session, state_name)
+    return calendar.count(state_name, start, end)
+
+
+async def add_business_days_service(
+    session: AsyncSession, state_name: str, start: date, days: int
+) -> date:
+    calendar = await get_business_calendar(session, state_name)
+    try:
+        return calendar.add(state_name, start, days)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e)) from e
+
+
+async def get_nearest_holidays_service(
+    session: AsyncSession,
+    day: date,
+    n: int,
+    state_name: str | None = None,
+    previous: bool = False,
+) -> list[Holiday] | list[HolidayRecord]:
+    """
+    Ближайшие n праздников с day и позже, либо до day от ближайшего
+    к более ранним. Без индекса в памяти — запрос с limit
+    """
+    if state_name is not None and state_name not in STATE_BITS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No such state exists in database",
+        )
+
+    if not settings.HOLIDAYS_INDEX_ENABLED:
+        result = await session.execute(
+            get_nearest_holidays_stmt(day, n, state_name, previous)
+        )
+        return list(result.scalars().unique().all())
+
+    await dataset_version.ensure_loaded(session)
+    await holiday_index.ensure_loaded(session)
+    if state_name is None:
+        if previous:
+            return holiday_index.previous(day, n)
+        return holiday_index.next(day, n)
+
+    state_holidays.ensure_built()
+    if previous:
+        return state_holidays.previous(state_name, day, n)
+    return state_holidays.next(state_name, day, n)
+
+
+async def lookup_holidays(
+    session: AsyncSession,
+    days: Sequence[int],
+    state_indexes: Sequence[int],
+    origin: int = 0,
+    names: bool = False,
+) -> bytes:
+    await dataset_version.ensure_loaded(session)
+    await holiday_index.ensure_loaded(session)
+    holiday_matrix.ensure_built()
+    try:
+        if names:
+            return holiday_matrix.lookup_names(days, state_indexes, origin)
+        return holiday_matrix.lookup(days, state_indexes, origin)
+    except KeyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=e.args[0]
+        ) from e
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        ) from e
+
+
+async def lookup_holidays_service(
+    session: AsyncSession, dates: list[date], states: list[str], names: bool = False
+) -> bytes:
+    """
+    JSON массив флагов или имён праздников для пар (dates[i], states[i])
+    """
+    try:
+        state_indexes = bytes(map(STATE_INDEXES.__getitem__, states))
+    except KeyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No such state exists in database",
+        ) from e
+
+    days = array("i", map(date.toordinal, dates))
+    result = await lookup_holidays(session, days, state_indexes, names=names)
+    return result if names else encode_flags(result)
+
+
+async def lookup_holidays_binary_service(session: AsyncSession, body: bytes) -> bytes:
+    """
+    Тело: uint32 n, n int32 дней с 1970-01-01 и n uint8 номеров штатов
+    в порядке us_states, всё little-endian. Ответ — n байтов 0/1
+    """
+    count = int.from_bytes(body[:4], "little")
+    if len(body) != 4 + count * 5:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Wrong binary body length",
+        )
+
+    days = array("i")
+    days.frombytes(body[4 : 4 + count * 4])
+    if sys.byteorder == "big":
+        days.byteswap()
+    return await lookup_holidays(
+        session, days, body[4 + count * 4 :], origin=EPOCH_ORDINAL
+    )
 
 
 async def create_holiday_service(
@@ -91,16 +526,112 @@ async def create_holiday_service(
         else HolidayTypeEnum.local
     )
 
-    db_states = await get_states_by_names(session, holiday_in.states)
+    db_states = await state_registry.get_states(session, holiday_in.states)
 
     for state in db_states:
         holiday.states.append(HolidayState(state=state))
 
+    await holiday_partitions.ensure(session, [holiday.date.year])
     session.add(holiday)
+    version = await dataset_version.bump(session)
     await session.commit()
+    holidays_cache.invalidate()
+    holiday_index.upsert(HolidayRecord.from_holiday(holiday))
+    dataset_version.publish(version)
     return holiday
 
 
+async def create_holidays_bulk_service(
+    session: AsyncSession, holidays_in: list[HolidayCreateSchema]
+) -> HolidayBulkResultSchema:
+    """
+    Штаты берутся из реестра, существующие имена читаются одним
+    запросом на всю пачку, праздники и их штаты вставляются множественными INSERT в одной
+    транзакции. Праздники с конфликтами пропускаются и попадают в отчёт
+    """
+    await state_registry.ensure_loaded(session)
+
+    names = {holiday_in.name for holiday_in in holidays_in}
+    existing_names = set(
+        await session.scalars(select(Holiday.name).filter(Holiday.name.in_(names)))
+    )
+
+    conflicts: list[HolidayBulkConflictSchema] = []
+    accepted: list[tuple[HolidayCreateSchema, list[int]]] = []
+    for i, holiday_in in enumerate(holidays_in):
+        holiday_state_ids = state_registry.get_ids(holiday_in.states)
+        if holiday_in.name in existing_names:
+            detail = (
+                f"Holiday with the name: {holiday_in.name} already exists in database"
+            )
+        elif not holiday_state_ids:
+            detail = "No such state exists in database"
+        else:
+            existing_names.add(holiday_in.name)
+            accepted.append((holiday_in, holiday_state_ids))
+            continue
+        conflicts.append(
+            HolidayBulkConflictSchema(index=i, name=holiday_in.name, detail=detail)
+        )
+
+    if not accepted:
+        return HolidayBulkResultSchema(created=[], conflicts=conflicts)
+
+    holiday_rows = [
+        {
+            "name": holiday_in.name,
+            "date": holiday_in.date,
+            "custom": True,
+            "type": (
+                HolidayTypeEnum.national
+                if len(holiday_state_ids) == 50
+                else HolidayTypeEnum.local
+            ),
+        }
+        for holiday_in, holiday_state_ids in accepted
+    ]
+    await holiday_partitions.ensure(
+        session, {holiday_row["date"].year for holiday_row in holiday_rows}
+    )
+    holiday_ids = list(
+        await session.scalars(
+            insert(Holiday).returning(Holiday.id, sort_by_parameter_order=True),
+            holiday_rows,
+        )
+    )
+    await session.execute(
+        insert(HolidayState),
+        [
+            {
+                "holiday_id": holiday_id,
+                "holiday_date": holiday_in.date,
+                "state_id": state_id,
+            }
+            for holiday_id, (holiday_in, holiday_state_ids) in zip(
+                holiday_ids, accepted
+            )
+            for state_id in holiday_state_ids
+        ],
+    )
+    version = await dataset_version.bump(session)
+    await session.commit()
+
+    holidays_cache.invalidate()
+    for holiday_id, holiday_row, (holiday_in, _) in zip(
+        holiday_ids, holiday_rows, accepted
+    ):
+        holiday_index.upsert(
+            HolidayRecord(
+                id=holiday_id,
+                mask=get_states_mask(holiday_in.states),
+                **holiday_row,
+            )
+        )
+    dataset_version.publish(version)
+
+    return HolidayBulkResultSchema(created=holiday_ids, conflicts=conflicts)
+
+
 async def update_holiday_by_id_service(
     session: AsyncSession,
     id: int,
@@ -112,13 +643,19 @@ async def update_holiday_by_id_service(
     db_holiday.date = new_holiday.date
     db_holiday.states.clear()
 
-    db_states = await get_states_by_names(session, new_holiday.states)
+    db_states = await state_registry.get_states(session, new_holiday.states)
 
     for state in db_states:
         db_holiday.states.append(HolidayState(state=state))
 
+    # смена года переносит строку в секцию нового года
+    await holiday_partitions.ensure(session, [db_holiday.date.year])
     session.add(db_holiday)
+    version = await dataset_version.bump(session)
     await session.commit()
+    holidays_cache.invalidate()
+    holiday_index.upsert(HolidayRecord.from_holiday(db_holiday))
+    dataset_version.publish(version)
     return db_holiday
 
 
@@ -126,4 +663,8 @@ async def delete_holiday_by_id_service(session: AsyncSession, id: int):
     db_holiday = await get_holiday_by_id(need_join=False, id=id, session=session)
 
     await session.delete(db_holiday)
+    version = await dataset_version.bump(session)
     await session.commit()
+    holidays_cache.invalidate()
+    holiday_index.remove(id)
+    dataset_version.publish(version)
@@ -0,0 +1,200 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+
+from datetime import date
+from pathlib import Path
+import asyncio
+import gzip
+import os
+import tempfile
+
+from countryholidays.index import (
+    STATE_BITS,
+    HolidayIndex,
+    HolidayRecord,
+    encode_holidays,
+    holiday_index,
+)
+from countryholidays.version import DatasetVersionTracker, dataset_version
+from core.config import settings
+
+
+# (год, штат); None вместо штата — все праздники года
+SnapshotKey = tuple[int, str | None]
+# ключ pg_advisory_xact_lock процесса, собирающего снимки при старте
+SNAPSHOTS_LOCK_KEY = 0x736E6170
+
+
+class SnapshotStore:
+    """
+    Готовые ответы списка праздников за год и за год в штате: JSON
+    и его gzip копия на диске, отдаются файлом без обращения к ORM.
+    В имени файла — версия данных, из которой он собран, поэтому
+    процесс с устаревшей версией не перезаписывает более новый снимок,
+    а готовый файл текущей версии берётся без записи. Изменения
+    индекса сбрасывают только затронутые снимки, они пересобираются
+    при следующем запросе
+    """
+
+    def __init__(
+        self,
+        index: HolidayIndex,
+        directory: Path,
+        version: DatasetVersionTracker,
+    ):
+        self.index = index
+        self.directory = directory
+        self.version = version
+        # версия снимка, который отдаёт этот процесс
+        self._built: dict[SnapshotKey, int] = {}
+        self._generation = 0
+        index.add_listener(self.on_index_change)
+
+    def get_version_path(
+        self, key: SnapshotKey, version: int, compressed: bool = False
+    ) -> Path:
+        year, state_name = key
+        suffix = ".json.gz" if compressed else ".json"
+        return self.directory / str(year) / f"{state_name or 'all'}.{version}{suffix}"
+
+    def on_index_change(self, old: HolidayRecord | None, new: HolidayRecord | None):
+        self._generation += 1
+        if old is None and new is None:
+            self._built.clear()
+            return
+        for record in (old, new):
+            if record is None:
+                continue
+            year = record.date.year
+            self._built.pop((year, None), None)
+            for holiday_state in record.states:
+                self._built.pop((year, holiday_state.state.name), None)
+
+    def _write(self, key: SnapshotKey, version: int, records: list[HolidayRecord]):
+        content = encode_holidays(records)
+        path = self.get_version_path(key, version)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        for target, data in (
+            (path, content),
+            (
+                self.get_version_path(key, version, True),
+                gzip.compress(content, mtime=0),
+            ),
+        ):
+            # файл подменяется целиком: отдаваемая копия не меняется на ходу
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_path, target)
+
+    def _prune(self, key: SnapshotKey, version: int):
+        """
+        Удаляет снимки ключа старше предыдущей версии: предыдущий
+        ещё может отдавать процесс, не перечитавший версию
+        """
+        year, state_name = key
+        name = state_name or "all"
+        versions = sorted(
+            int(path.name.split(".")[1])
+            for path in (self.directory / str(year)).glob(f"{name}.*.json")
+        )
+        previous = [old_version for old_version in versions if old_version < version]
+        for old_version in previous[:-1]:
+            for compressed in (False, True):
+                self.get_version_path(key, old_version, compressed).unlink(
+                    missing_ok=True
+                )
+
+    def _write_all(
+        self,
+        snapshots: list[tuple[SnapshotKey, list[HolidayRecord]]],
+        version: int,
+        overwrite: bool,
+    ):
+        for key, records in snapshots:
+            if not overwrite and self.get_version_path(key, version, True).exists():
+                # снимок этой версии уже записал другой процесс
+                continue
+            self._write(key, version, records)
+            self._prune(key, version)
+
+    def _get_snapshots(
+        self, year: int, state_names: list[str | None]
+    ) -> list[tuple[SnapshotKey, list[HolidayRecord]]]:
+        records = self.index.between(date(year, 1, 1), date(year, 12, 31))
+        if not records:
+            return []
+        return [
+            (
+                (year, state_name),
+                records
+                if state_name is None
+                else [
+                    record for record in records if record.mask & STATE_BITS[state_name]
+                ],
+            )
+            for state_name in state_names
+        ]
+
+    async def _build(
+        self,
+        snapshots: list[tuple[SnapshotKey, list[HolidayRecord]]],
+        overwrite: bool = False,
+    ) -> int:
+        # версия берётся вместе с записями индекса, до первого await
+        version = self.version.version
+        generation = self._generation
+        await asyncio.to_thread(self._write_all, snapshots, version, overwrite)
+        # за время записи индекс мог измениться, тогда снимки пересоберутся
+        if generation == self._generation:
+            self._built.update((key, version) for key, _ in snapshots)
+        return version
+
+    async def get_path(self, key: SnapshotKey, compressed: bool = False) -> Path | None:
+        """
+        Путь к снимку, собранному при необходимости. None, если за год
+        нет праздников и снимка не будет
+        """
+        version = self._built.get(key)
+        if version is None:
+            snapshots = self._get_snapshots(key[0], [key[1]])
+            if not snapshots:
+                return None
+            version = await self._build(snapshots)
+        return self.get_version_path(key, version, compressed)
+
+    async def build_all(self, session: AsyncSession) -> bool:
+        """
+        Собирает все снимки при старте. Параллельно стартующие процессы
+        не повторяют работу: собирает тот, кто взял advisory lock до
+        конца транзакции session, остальные соберут снимки по запросам.
+        False, если сборку ведёт другой процесс
+        """
+        if not await session.scalar(
+            text("SELECT pg_try_advisory_xact_lock(:key)"),
+            {"key": SNAPSHOTS_LOCK_KEY},
+        ):
+            return False
+        years = sorted(
+            {record.date.year for record in self.index.between(date.min, date.max)}
+        )
+        state_names: list[str | None] = [None, *STATE_BITS]
+        # при старте файлы переписываются: версия могла начаться заново
+        # вместе с базой, и файл с тем же номером собран из других данных
+        await self._build(
+            [
+                snapshot
+                for year in years
+                for snapshot in self._get_snapshots(year, state_names)
+            ],
+            overwrite=True,
+        )
+        return True
+
+    def clear(self):
+        self._built.clear()
+
+
+snapshot_store = SnapshotStore(
+    holiday_index, settings.HOLIDAYS_SNAPSHOTS_DIR, dataset_version
+)
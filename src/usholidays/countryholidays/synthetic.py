@@ -0,0 +1,245 @@
+"""
+Синтетические праздники для нагрузочных сценариев и тестов на
+больших объёмах. Строки пишутся через COPY с заданными id, затем
+сдвигается sequence, поэтому миллион праздников загружается
+за секунды
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, select, text
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+from itertools import accumulate
+from time import perf_counter
+import random
+
+from countryholidays.models import Holiday, HolidayState, State
+from countryholidays.partitions import holiday_partitions
+from countryholidays.seeding import copy_records
+from countryholidays.version import dataset_version
+from core.models import HolidayTypeEnum
+from core.utils import us_states
+
+
+# национальные праздники повторяются каждый год под тем же именем и датой
+NATIONAL_HOLIDAYS = tuple(
+    (f"Synthetic National Day {i}", month, 1 + i * 2)
+    for i, month in enumerate(range(1, 13))
+)
+# число штатов у местного праздника: чаще один-два
+LOCAL_STATES_COUNTS = (1, 2, 3, 4, 5)
+LOCAL_STATES_WEIGHTS = (50, 25, 12, 8, 5)
+
+
+@dataclass
+class DatasetReport:
+    holidays: int = 0
+    holidays_states: int = 0
+    build: float = 0.0
+    write: float = 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"Loaded {self.holidays} holidays and {self.holidays_states} "
+            f"holiday states (build={self.build * 1000:.1f}ms, "
+            f"write={self.write * 1000:.1f}ms)"
+        )
+
+
+async def ensure_states(session: AsyncSession) -> list[int]:
+    state_ids = list(await session.scalars(select(State.id).order_by(State.id)))
+    if state_ids:
+        return state_ids
+    return list(
+        await session.scalars(
+            insert(State).returning(State.id, sort_by_parameter_order=True),
+            [{"name": state_name} for state_name in us_states],
+        )
+    )
+
+
+def get_state_cum_weights(
+    state_count: int, skew: float, rng: random.Random
+) -> list[float]:
+    """
+    Накопленные веса штатов по закону Ципфа: штат с рангом r
+    выбирается с весом 1 / r ** skew, ранги раздаются случайно
+    """
+    ranks = list(range(1, state_count + 1))
+    rng.shuffle(ranks)
+    return list(accumulate(1 / rank**skew for rank in ranks))
+
+
+def build_dataset_rows(
+    holidays: int,
+    state_ids: list[int],
+    first_id: int = 1,
+    years: range = range(1990, 2051),
+    seed: int = 42,
+    national_share: float = 0.05,
+    custom_share: float = 0.7,
+    skew: float = 1.0,
+) -> tuple[list[tuple], list[tuple[int, date, int]]]:
+    """
+    Строки (id, name, date, custom, type) и связи
+    (holiday_id, holiday_date, state_id).
+    Национальные праздники отмечаются во всех штатах, местные —
+    в одном-пяти, выбранных с перекосом в пользу «крупных» штатов
+    """
+    rng = random.Random(seed)
+    state_cum_weights = get_state_cum_weights(len(state_ids), skew, rng)
+    start = date(years.start, 1, 1)
+    dates = [
+        start + timedelta(days=day)
+        for day in range((date(years.stop, 1, 1) - start).days)
+    ]
+    national_type = HolidayTypeEnum.national.value
+    local_type = HolidayTypeEnum.local.value
+    local_states_counts = rng.choices(
+        LOCAL_STATES_COUNTS, weights=LOCAL_STATES_WEIGHTS, k=holidays
+    )
+
+    holiday_rows = []
+    holiday_states = []
+    for holiday_id, local_states_count in zip(
+        range(first_id, first_id + holidays), local_states_counts
+    ):
+        custom = rng.random() < custom_share
+        if rng.random() < national_share:
+            name, month, day = rng.choice(NATIONAL_HOLIDAYS)
+            holiday_date = date(rng.choice(years), month, day)
+            holiday_rows.append((holiday_id, name, holiday_date, custom, national_type))
+            holiday_states.extend(
+                (holiday_id, holiday_date, state_id) for state_id in state_ids
+            )
+            continue
+
+        holiday_date = rng.choice(dates)
+        holiday_rows.append(
+            (
+                holiday_id,
+                f"Synthetic Day {holiday_id}",
+                holiday_date,
+                custom,
+                local_type,
+            )
+        )
+        holiday_state_ids = set(
+            rng.choices(state_ids, cum_weights=state_cum_weights, k=local_states_count)
+        )
+        holiday_states.extend(
+            (holiday_id, holiday_date, state_id)
+            for state_id in sorted(holiday_state_ids)
+        )
+
+    return holiday_rows, holiday_states
+
+
+async def drop_secondary_indexes(
+    session: AsyncSession, table_names: list[str]
+) -> list[str]:
+    """
+    Снимает внешние ключи и неуникальные индексы таблиц и возвращает
+    команды для их восстановления. Построить индекс заново по
+    загруженным строкам быстрее, чем обновлять его на каждой строке COPY
+    """
+    constraints = await session.execute(
+        text(
+            "SELECT conrelid::regclass::text, quote_ident(conname), "
+            "pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE contype = 'f' AND conparentid = 0 "
+            "AND conrelid::regclass::text = ANY(:table_names)"
+        ),
+        {"table_names": table_names},
+    )
+    indexes = await session.execute(
+        text(
+            "SELECT indexrelid::regclass::text, pg_get_indexdef(indexrelid) "
+            "FROM pg_index WHERE NOT indisunique "
+            "AND indrelid::regclass::text = ANY(:table_names)"
+        ),
+        {"table_names": table_names},
+    )
+
+    restore = []
+    for table_name, name, definition in constraints.all():
+        await session.execute(text(f"ALTER TABLE {table_name} DROP CONSTRAINT {name}"))
+        restore.append(f"ALTER TABLE {table_name} ADD CONSTRAINT {name} {definition}")
+    for name, definition in indexes.all():
+        await session.execute(text(f"DROP INDEX {name}"))
+        # индекс секционированной таблицы описан как ON ONLY, без секций
+        restore.insert(0, definition.replace(" ON ONLY ", " ON ", 1))
+    return restore
+
+
+async def load_dataset(
+    session: AsyncSession,
+    holidays: int,
+    years: range = range(1990, 2051),
+    seed: int = 42,
+    national_share: float = 0.05,
+    custom_share: float = 0.7,
+    skew: float = 1.0,
+    rebuild_indexes: bool = True,
+) -> DatasetReport:
+    """
+    Добавляет holidays праздников после уже существующих и
+    увеличивает версию данных. С rebuild_indexes индексы и внешние
+    ключи на время загрузки снимаются, таблицы при этом заблокированы
+    """
+    report = DatasetReport()
+    started = perf_counter()
+    state_ids = await ensure_states(session)
+    last_id = (
+        await session.scalar(select(Holiday.id).order_by(Holiday.id.desc()).limit(1))
+    ) or 0
+    holiday_rows, holiday_states = build_dataset_rows(
+        holidays,
+        state_ids,
+        first_id=last_id + 1,
+        years=years,
+        seed=seed,
+        national_share=national_share,
+        custom_share=custom_share,
+        skew=skew,
+    )
+    report.holidays = len(holiday_rows)
+    report.holidays_states = len(holiday_states)
+    report.build = perf_counter() - started
+    started = perf_counter()
+
+    await holiday_partitions.ensure(
+        session, {holiday_date.year for _, _, holiday_date, _, _ in holiday_rows}
+    )
+    restore = []
+    if rebuild_indexes:
+        await session.execute(text("SET LOCAL maintenance_work_mem = '256MB'"))
+        restore = await drop_secondary_indexes(
+            session, [Holiday.__tablename__, HolidayState.__tablename__]
+        )
+    await copy_records(
+        session,
+        Holiday.__tablename__,
+        ["id", "name", "date", "custom", "type"],
+        holiday_rows,
+    )
+    await copy_records(
+        session,
+        HolidayState.__tablename__,
+        ["holiday_id", "holiday_date", "state_id"],
+        holiday_states,
+    )
+    for statement in restore:
+        await session.execute(text(statement))
+    await session.execute(
+        text(
+            "SELECT setval(pg_get_serial_sequence('holidays', 'id'), max(id)) FROM holidays"
+        )
+    )
+    version = await dataset_version.bump(session)
+    await session.commit()
+    dataset_version.publish(version)
+    await session.execute(text("ANALYZE"))
+    report.write = perf_counter() - started
+    return report
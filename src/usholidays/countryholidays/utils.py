@@ -4,19 +4,14 @@ from fastapi_filter.contrib.sqlalchemy import Filter
 from fastapi import HTTPException, status
 from typing import Optional
 from datetime import date
-import re
+import base64
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
-from sqlalchemy import select, Select, and_, extract
+from sqlalchemy import select, Select, and_, false, tuple_
 
 from countryholidays.models import State, Holiday, HolidayState
 from core.models import HolidayTypeEnum
-from core.utils import (
-    get_national_holidays_names,
-    us_states,
-    get_country_holidays_by_state,
-)
 
 
 class StateFilter(Filter):
@@ -38,25 +33,74 @@ class HolidayFilter(Filter):
 
 
 def get_query_by_year_month(stmt: Select, year: int, month: int):
-    return stmt.where(
-        and_(
-            extract("YEAR", Holiday.date) == year,
-            extract("MONTH", Holiday.date) == month,
-        )
-    )
+    """
+    Месяц задаётся полуинтервалом дат [начало месяца, начало следующего),
+    чтобы запрос мог использовать индекс по holidays.date и читал
+    только секцию своего года
+    """
+    try:
+        start = date(year, month, 1)
+        end = date(year + month // 12, month % 12 + 1, 1)
+    except ValueError:
+        return stmt.where(false())
+
+    return stmt.where(and_(Holiday.date >= start, Holiday.date < end))
 
 
 def get_query_between_dates(stmt: Select, start: date, end: date):
     return stmt.where(Holiday.date.between(start, end))
 
 
-def create_holiday_with_model_type(holiday_name: str, holiday_date: date) -> Holiday:
-    holiday_type = (
-        HolidayTypeEnum.national
-        if holiday_name in get_national_holidays_names()
-        else HolidayTypeEnum.local
+def get_query_after(stmt: Select, after: tuple[date, int]):
+    """
+    Праздники после позиции курсора в порядке (date, id). Сравнение
+    кортежей не отсекает секции, поэтому дата ограничена отдельно
+    """
+    holiday_date, id = after
+    return stmt.where(
+        Holiday.date >= holiday_date,
+        tuple_(Holiday.date, Holiday.id) > tuple_(holiday_date, id),
     )
-    return Holiday(name=holiday_name, date=holiday_date, type=holiday_type)
+
+
+def get_query_by_period(
+    stmt: Select,
+    year: str | None = None,
+    month: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+):
+    # год и месяц
+    if year is not None and month is not None:
+        return get_query_by_year_month(stmt, int(year), int(month))
+    # старт и конец периода
+    if start is not None and end is not None:
+        return get_query_between_dates(stmt, start, end)
+    # не был задан год и месяц либо период
+    return stmt
+
+
+def has_state_filter(apiFilter: HolidayFilter) -> bool:
+    return any(field_name == "states" for field_name, _ in apiFilter.filtering_fields)
+
+
+def encode_cursor(holiday_date: date, id: int) -> str:
+    raw = f"{holiday_date.isoformat()},{id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[date, int]:
+    """
+    Курсор — позиция последнего отданного праздника в порядке (date, id)
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        holiday_date, id = raw.split(",")
+        return date.fromisoformat(holiday_date), int(id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Wrong cursor"
+        ) from None
 
 
 async def get_holiday_by_id(
@@ -84,64 +128,3 @@ async def get_holiday_by_id(
         )
 
     return db_holiday
-
-
-async def get_states_by_names(session: AsyncSession, states: list[str]):
-    db_states_result = await session.execute(
-        select(State).filter(State.name.in_(states))
-    )
-    db_states = db_states_result.scalars().all()
-    if len(db_states) == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="No such state exists in database",
-        )
-
-    return db_states
-
-
-async def populate_db(session: AsyncSession):
-    table_exists = await session.execute(select(1).select_from(Holiday).limit(1))
-    if table_exists.scalar():
-        return
-
-    delimiters = r"[&/;]"
-    holidays_list: dict[str, dict[str, Holiday]] = {}
-
-    for state_name in us_states:
-        state_model = State(name=state_name)
-
-        for holiday_date, holiday_name in get_country_holidays_by_state(
-            state_name
-        ).items():
-            """
-            Иногда могут попадаться названия вроде Martin King & St. Jeff Day
-            это два разных праздника, но могут отмечаться в один день в штате,
-            поэтому их надо разделить
-            """
-            holidays_by_date = [i.strip() for i in re.split(delimiters, holiday_name)]
-
-            for cur_holiday_name in holidays_by_date:
-                holiday_list_by_name = holidays_list.get(cur_holiday_name)
-                if holiday_list_by_name is None:
-                    holiday_model = create_holiday_with_model_type(
-                        cur_holiday_name, holiday_date
-                    )
-                    holidays_list[cur_holiday_name] = {str(holiday_date): holiday_model}
-                    holiday_state_model = HolidayState(holiday=holiday_model)
-                else:
-                    holiday_by_date = holiday_list_by_name.get(str(holiday_date))
-                    if holiday_by_date is None:
-                        holiday_model = create_holiday_with_model_type(
-                            cur_holiday_name, holiday_date
-                        )
-                        holidays_list[cur_holiday_name][str(holiday_date)] = (
-                            holiday_model
-                        )
-                        holiday_state_model = HolidayState(holiday=holiday_model)
-                    else:
-                        holiday_state_model = HolidayState(holiday=holiday_by_date)
-
-                state_model.holidays.append(holiday_state_model)
-        session.add(state_model)
-    await session.commit()
@@ -0,0 +1,117 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from asyncio import Lock
+from collections.abc import Callable
+from time import monotonic
+import hashlib
+
+from countryholidays.models import DatasetVersion
+from core.config import settings
+
+
+DATASET_VERSION_ID = 1
+
+# вызывается, когда версию увеличил другой процесс
+VersionListener = Callable[[], None]
+
+
+class DatasetVersionTracker:
+    """
+    Копия версии данных в процессе: перечитывается из базы не чаще
+    раза в ttl секунд, между перечитываниями обновляется изменяющими
+    сервисами после commit, поэтому ETag считается без запросов.
+    Если версию увеличил другой процесс, подписчики сбрасывают
+    производные от данных структуры. ttl=None — версия читается один
+    раз, так можно только при единственном процессе приложения
+    """
+
+    def __init__(self, ttl: float | None = None):
+        self.ttl = ttl
+        self.loaded = False
+        self._lock = Lock()
+        self._loaded_at = 0.0
+        self._listeners: list[VersionListener] = []
+        self.version = 0
+
+    async def load(self, session: AsyncSession):
+        version = (
+            await session.scalar(
+                select(DatasetVersion.version).filter_by(id=DATASET_VERSION_ID)
+            )
+            or 0
+        )
+        changed = self.loaded and version > self.version
+        self.version = max(self.version, version)
+        self.loaded = True
+        self._loaded_at = monotonic()
+        if changed:
+            self._notify()
+
+    def is_fresh(self) -> bool:
+        if not self.loaded:
+            return False
+        return self.ttl is None or monotonic() - self._loaded_at < self.ttl
+
+    async def ensure_loaded(self, session: AsyncSession):
+        if self.is_fresh():
+            return
+        async with self._lock:
+            if not self.is_fresh():
+                await self.load(session)
+
+    def clear(self):
+        self.loaded = False
+        self.version = 0
+
+    def add_listener(self, listener: VersionListener):
+        self._listeners.append(listener)
+
+    def _notify(self):
+        for listener in self._listeners:
+            listener()
+
+    async def bump(self, session: AsyncSession) -> int:
+        """
+        Увеличивает версию в текущей транзакции. Строка блокируется
+        до commit, так что параллельные изменения получают разные версии
+        """
+        stmt = insert(DatasetVersion).values(id=DATASET_VERSION_ID, version=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DatasetVersion.id],
+            set_={"version": DatasetVersion.version + 1},
+        ).returning(DatasetVersion.version)
+        return (await session.execute(stmt)).scalar_one()
+
+    def publish(self, version: int):
+        """
+        Вызывается после commit, когда новая версия видна всем.
+        Пропуск версий значит, что между ними данные менял другой процесс
+        """
+        changed = self.loaded and version > self.version + 1
+        self.version = max(self.version, version)
+        if changed:
+            self._notify()
+
+
+def make_etag(version: int, key: tuple) -> str:
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=8).hexdigest()
+    return f'"{version}-{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    If-None-Match сравнивается слабо: префикс W/ не учитывается
+    """
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+dataset_version = DatasetVersionTracker(settings.DATASET_VERSION_TTL)
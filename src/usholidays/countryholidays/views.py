@@ -1,43 +1,96 @@
-from fastapi import APIRouter, Depends, status, Query
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    Path,
+    Request,
+    Response,
+    status,
+    Query,
+)
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi_filter import FilterDepends
 
 from datetime import date
 from typing import Annotated, Optional
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import ValidationError
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from countryholidays.schemas import (
+    BusinessDaysOffsetSchema,
+    BusinessDaysSchema,
+    HolidayBulkResultSchema,
     HolidayCreateSchema,
+    HolidayLookupSchema,
     HolidaySchema,
     HolidayUpdateSchema,
 )
 from countryholidays.services import (
     get_holidays_service,
+    get_holidays_etag_service,
+    export_holidays_service,
+    get_holidays_snapshot_service,
+    get_business_days_service,
+    add_business_days_service,
+    get_nearest_holidays_service,
+    lookup_holidays_service,
+    lookup_holidays_binary_service,
     create_holiday_service,
+    create_holidays_bulk_service,
     update_holiday_by_id_service,
     delete_holiday_by_id_service,
 )
-from core.dependencies import get_async_session
-from countryholidays.utils import HolidayFilter
+from core.dependencies import get_async_session, get_async_session_factory
+from countryholidays.utils import HolidayFilter, encode_cursor
+from countryholidays.cache import holidays_cache
+from countryholidays.index import HolidayRecord, encode_holidays
+from countryholidays.version import etag_matches
+from countryholidays.export import EXPORT_MEDIA_TYPES, ExportFormatEnum
 from auth.models import User
 from auth.fastapi_users import current_active_user
 
 router = APIRouter(tags=["Holidays"], prefix="/holidays")
 
+YearQuery = Annotated[
+    Optional[str], Query(max_length=4, min_length=4, pattern="^\\d+$")
+]
+MonthQuery = Annotated[
+    Optional[str], Query(max_length=2, min_length=2, pattern="^\\d+$")
+]
+
 
 @router.get("", response_model=list[HolidaySchema])
 async def get_holidays(
+    response: Response,
     holiday_filter: Annotated[HolidayFilter, FilterDepends(HolidayFilter)],
     session: Annotated[AsyncSession, Depends(get_async_session)],
-    year: Annotated[
-        Optional[str], Query(max_length=4, min_length=4, pattern="^\\d+$")
-    ] = None,
-    month: Annotated[
-        Optional[str], Query(max_length=2, min_length=2, pattern="^\\d+$")
-    ] = None,
+    year: YearQuery = None,
+    month: MonthQuery = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
+    limit: Annotated[Optional[int], Query(ge=1, le=1000)] = None,
+    cursor: Optional[str] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
 ):
+    etag = await get_holidays_etag_service(
+        session=session,
+        apiFilter=holiday_filter,
+        year=year,
+        month=month,
+        start=start_date,
+        end=end_date,
+        limit=limit,
+        cursor=cursor,
+    )
+    # данные не менялись с прошлого ответа клиенту
+    if etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+
     holidays = await get_holidays_service(
         session=session,
         apiFilter=holiday_filter,
@@ -45,11 +98,171 @@ async def get_holidays(
         month=month,
         start=start_date,
         end=end_date,
+        limit=limit,
+        cursor=cursor,
     )
 
+    headers = {"ETag": etag}
+    # полная страница означает, что за ней могут быть ещё праздники
+    if limit is not None and len(holidays) == limit:
+        last_holiday = holidays[-1]
+        headers["X-Next-Cursor"] = encode_cursor(last_holiday.date, last_holiday.id)
+
+    # записи индекса уже содержат свой JSON, валидация схемой не нужна
+    if all(isinstance(holiday, HolidayRecord) for holiday in holidays):
+        return Response(
+            content=encode_holidays(holidays),
+            media_type="application/json",
+            headers=headers,
+        )
+
+    response.headers.update(headers)
     return holidays
 
 
+@router.get("/export")
+async def export_holidays(
+    holiday_filter: Annotated[HolidayFilter, FilterDepends(HolidayFilter)],
+    session_factory: Annotated[
+        async_sessionmaker[AsyncSession], Depends(get_async_session_factory)
+    ],
+    year: YearQuery = None,
+    month: MonthQuery = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    export_format: Annotated[ExportFormatEnum, Query(alias="format")] = (
+        ExportFormatEnum.ndjson
+    ),
+):
+    content = export_holidays_service(
+        session_factory=session_factory,
+        apiFilter=holiday_filter,
+        year=year,
+        month=month,
+        start=start_date,
+        end=end_date,
+        export_format=export_format,
+    )
+    return StreamingResponse(content, media_type=EXPORT_MEDIA_TYPES[export_format])
+
+
+@router.get("/snapshots/{year}")
+@router.get("/snapshots/{year}/{state}")
+async def get_holidays_snapshot(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    year: Annotated[int, Path(ge=1, le=9999)],
+    state: Optional[str] = None,
+    accept_encoding: Annotated[str, Header()] = "",
+):
+    compressed = "gzip" in accept_encoding
+    path = await get_holidays_snapshot_service(session, year, state, compressed)
+    headers = {"Vary": "Accept-Encoding"}
+    if compressed:
+        headers["Content-Encoding"] = "gzip"
+    return FileResponse(path, media_type="application/json", headers=headers)
+
+
+@router.get("/cache/stats")
+async def get_holidays_cache_stats(
+    _: Annotated[User, Depends(current_active_user)],
+):
+    return holidays_cache.stats()
+
+
+NearestQuery = Annotated[int, Query(ge=1, le=1000)]
+
+
+def get_holidays_response(holidays: list) -> Response | list:
+    # записи индекса уже содержат свой JSON, валидация схемой не нужна
+    if all(isinstance(holiday, HolidayRecord) for holiday in holidays):
+        return Response(
+            content=encode_holidays(holidays), media_type="application/json"
+        )
+    return holidays
+
+
+@router.get("/next", response_model=list[HolidaySchema])
+async def get_next_holidays(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    day: Annotated[date, Query(alias="date")],
+    state: Optional[str] = None,
+    n: NearestQuery = 1,
+):
+    holidays = await get_nearest_holidays_service(session, day, n, state)
+    return get_holidays_response(holidays)
+
+
+@router.get("/previous", response_model=list[HolidaySchema])
+async def get_previous_holidays(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    day: Annotated[date, Query(alias="date")],
+    state: Optional[str] = None,
+    n: NearestQuery = 1,
+):
+    holidays = await get_nearest_holidays_service(session, day, n, state, previous=True)
+    return get_holidays_response(holidays)
+
+
+@router.get("/business-days", response_model=BusinessDaysSchema)
+async def get_business_days(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    state: str,
+    start: date,
+    end: date,
+):
+    business_days = await get_business_days_service(session, state, start, end)
+    return BusinessDaysSchema(
+        state=state, start=start, end=end, business_days=business_days
+    )
+
+
+@router.get("/add-business-days", response_model=BusinessDaysOffsetSchema)
+async def add_business_days(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    state: str,
+    start: date,
+    days: Annotated[int, Query(ge=-100_000, le=100_000)],
+):
+    result_date = await add_business_days_service(session, state, start, days)
+    return BusinessDaysOffsetSchema(
+        state=state, start=start, days=days, date=result_date
+    )
+
+
+@router.post(
+    "/lookup",
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {"schema": HolidayLookupSchema.model_json_schema()},
+                "application/octet-stream": {
+                    "schema": {"type": "string", "format": "binary"}
+                },
+            },
+            "required": True,
+        }
+    },
+)
+async def lookup_holidays(
+    request: Request,
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+):
+    body = await request.body()
+    # пары приходят миллионами, поэтому тело разбирается без модели FastAPI
+    if request.headers.get("content-type", "").startswith("application/octet-stream"):
+        content = await lookup_holidays_binary_service(session, body)
+        return Response(content=content, media_type="application/octet-stream")
+
+    try:
+        lookup_in = HolidayLookupSchema.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors()) from e
+    content = await lookup_holidays_service(
+        session, lookup_in.dates, lookup_in.states, lookup_in.names
+    )
+    return Response(content=content, media_type="application/json")
+
+
 @router.post("", response_model=HolidaySchema, status_code=status.HTTP_201_CREATED)
 async def create_holiday(
     session: Annotated[AsyncSession, Depends(get_async_session)],
@@ -60,6 +273,19 @@ async def create_holiday(
     return holiday_created
 
 
+@router.post(
+    "/bulk",
+    response_model=HolidayBulkResultSchema,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_holidays_bulk(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    _: Annotated[User, Depends(current_active_user)],
+    holidays_in: list[HolidayCreateSchema],
+):
+    return await create_holidays_bulk_service(session, holidays_in)
+
+
 @router.put("/{id}", response_model=HolidaySchema)
 async def update_holiday_by_id(
     id: int,
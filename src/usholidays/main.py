@@ -2,20 +2,57 @@ from fastapi import FastAPI
 
 import uvicorn
 from contextlib import asynccontextmanager
+from datetime import date
 from countryholidays.views import router as holidays_router
 from auth.views import router as auth_router
-from core.dependencies import dispose_engine
+from core.dependencies import async_engine, dispose_engine, async_session_factory
+from core.config import settings
+from core.metrics import MetricsMiddleware, register_cache, register_pool
+from core.metrics import router as metrics_router
+from countryholidays.businessdays import business_calendar
+from countryholidays.cache import holidays_cache
+from countryholidays.index import holiday_index
+from countryholidays.lookup import holiday_matrix
+from countryholidays.nearest import state_holidays
+from countryholidays.partitions import holiday_partitions
+from countryholidays.registry import state_registry
+from countryholidays.snapshots import snapshot_store
+from countryholidays.version import dataset_version
+from auth.cache import users_cache
+from auth.dependencies import get_jwt_strategy
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    async with async_session_factory() as session:
+        await state_registry.load(session)
+        this_year = date.today().year
+        await holiday_partitions.ensure(
+            session,
+            range(this_year, this_year + settings.HOLIDAYS_PARTITIONS_AHEAD + 1),
+        )
+        if settings.HOLIDAYS_INDEX_ENABLED:
+            # снимки называются по версии данных, она читается до индекса
+            await dataset_version.ensure_loaded(session)
+            await holiday_index.load(session)
+            await snapshot_store.build_all(session)
+            business_calendar.build()
+            holiday_matrix.build()
+            state_holidays.build()
     yield
     await dispose_engine()
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
 app.include_router(holidays_router)
 app.include_router(auth_router)
+app.include_router(metrics_router)
+
+register_pool(async_engine.pool)  # type: ignore
+register_cache("holidays", holidays_cache)
+register_cache("users", users_cache)
+register_cache("jwt_tokens", get_jwt_strategy().verified_tokens)
 
 
 if __name__ == "__main__":
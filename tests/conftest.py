@@ -6,11 +6,25 @@ from sqlalchemy.ext.asyncio import (
 
 from src.usholidays.core.config import settings
 from src.usholidays.core.models import Base
-from src.usholidays.countryholidays.views import get_async_session
+from src.usholidays.countryholidays.views import (
+    get_async_session,
+    get_async_session_factory,
+)
 from src.usholidays.main import app
 from tests.utils import populate_test_db
 
+# кэши и счётчик запросов живут в модулях, импортированных приложением без префикса src.usholidays
+from countryholidays.cache import holidays_cache
+from countryholidays.index import holiday_index
+from countryholidays.partitions import holiday_partitions
+from countryholidays.registry import state_registry
+from countryholidays.synthetic import load_dataset
+from countryholidays.version import dataset_version
+from auth.cache import users_cache
+from core.query_log import install_query_log
+
 from httpx import ASGITransport, AsyncClient
+import pytest
 import pytest_asyncio
 
 settings.DB_HOST = "localhost"
@@ -19,6 +33,19 @@ async_engine = create_async_engine(url=settings.db_url, echo=False)
 async_session_factory = async_sessionmaker(
     bind=async_engine, expire_on_commit=False, autoflush=False, autocommit=False
 )
+install_query_log(async_engine.sync_engine)
+
+
+def pytest_addoption(parser: pytest.Parser):
+    parser.addoption(
+        "--synthetic-holidays",
+        type=int,
+        # планы запросов проверяются на индексах: при ~650 праздниках в
+        # каждой годовой секции 1990-2050 планировщик выбирает индексы,
+        # а при 20000 (~330 на секцию) ему выгоднее читать секции целиком
+        default=40_000,
+        help="number of holidays loaded by the synthetic_holidays fixture",
+    )
 
 
 @pytest_asyncio.fixture(scope="function", loop_scope="module")
@@ -38,6 +65,9 @@ async def client():
             yield async_session
 
     app.dependency_overrides[get_async_session] = get_session
+    app.dependency_overrides[get_async_session_factory] = lambda: (
+        async_session_factory
+    )
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
     ) as client:
@@ -72,6 +102,12 @@ async def get_jwt(client: AsyncClient):
 
 @pytest_asyncio.fixture(scope="module", loop_scope="module", autouse=True)
 async def setup_db():
+    holidays_cache.invalidate()
+    holiday_index.clear()
+    state_registry.clear()
+    dataset_version.clear()
+    users_cache.invalidate()
+    holiday_partitions.clear()
     async with async_engine.connect() as conn:
         # await conn.execute(CreateSchema("testing"))
         await conn.run_sync(Base.metadata.create_all)
@@ -86,3 +122,17 @@ async def setup_db():
         # await conn.execute(DropSchema("testing"))
         await conn.commit()
     await async_engine.dispose()
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def synthetic_holidays(request: pytest.FixtureRequest, setup_db) -> int:
+    """
+    Синтетические праздники поверх тестовых, объём задаётся опцией
+    --synthetic-holidays: pytest --synthetic-holidays 1000000
+    """
+    holidays = request.config.getoption("synthetic_holidays")
+    async with async_session_factory() as session:
+        await load_dataset(session, holidays)
+    holidays_cache.invalidate()
+    holiday_index.clear()
+    return holidays
@@ -1,12 +1,25 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.orm import selectinload
 
 from src.usholidays.countryholidays.models import Holiday, HolidayState
+from src.usholidays.core.models import HolidayTypeEnum
+from countryholidays.snapshots import snapshot_store
+from countryholidays.cache import holidays_cache
+from countryholidays.index import holiday_index
+from countryholidays.partitions import get_partition_years
+from countryholidays.synthetic import load_dataset
+from countryholidays.version import dataset_version
+from core.config import settings
+from core.utils import us_states
+from tests.utils import assert_max_queries
 
 from fastapi import status
+from datetime import date
 from httpx import AsyncClient
+from pathlib import Path
 import pytest
+import json
 
 
 @pytest.mark.asyncio(loop_scope="module")
@@ -69,6 +82,192 @@ async def test_get_holidays(
             assert res[1]["name"] == "Testing Local Day"
 
 
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_holidays_pagination(client: AsyncClient):
+    names = []
+    params = {"limit": "1"}
+
+    for _ in range(3):
+        response = await client.get("http://127.0.0.1:8000/holidays", params=params)
+
+        assert response.status_code == status.HTTP_200_OK
+
+        names += [holiday["name"] for holiday in response.json()]
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+
+    assert names == ["Testing National Day", "Testing Local Day"]
+    assert response.json() == []
+
+    response = await client.get(
+        "http://127.0.0.1:8000/holidays", params={"limit": "1", "cursor": "???"}
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "Wrong cursor"}
+
+
+@pytest.mark.asyncio(loop_scope="module")
+@pytest.mark.parametrize(
+    "request_string, status_code, content",
+    [
+        (
+            "http://127.0.0.1:8000/holidays/export?state__name__in=CA",
+            status.HTTP_200_OK,
+            None,
+        ),
+        (
+            "http://127.0.0.1:8000/holidays/export?year=2025&month=10&format=ndjson",
+            status.HTTP_200_OK,
+            '{"name":"Testing Local Day","date":"2025-10-10","states":["AL","CA"]}\n',
+        ),
+        (
+            "http://127.0.0.1:8000/holidays/export?custom=true&format=csv",
+            status.HTTP_200_OK,
+            'name,date,states\nTesting Local Day,2025-10-10,"AL,CA"\n',
+        ),
+        (
+            "http://127.0.0.1:8000/holidays/export?year=2025",
+            status.HTTP_404_NOT_FOUND,
+            None,
+        ),
+    ],
+)
+async def test_export_holidays(
+    client: AsyncClient, request_string: str, status_code: int, content: str | None
+):
+    response = await client.get(request_string)
+
+    assert response.status_code == status_code
+
+    if content is not None:
+        assert response.text == content
+    elif status_code == status.HTTP_200_OK:
+        exported = [json.loads(line) for line in response.text.splitlines()]
+        listed = (
+            await client.get("http://127.0.0.1:8000/holidays?state__name__in=CA")
+        ).json()
+
+        assert exported == listed
+        assert len(exported[0]["states"]) == 50
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_lookup_holidays(client: AsyncClient):
+    url = "http://127.0.0.1:8000/holidays/lookup"
+    dates = ["2025-03-12", "2025-10-10", "2025-10-10", "2025-10-11", "1800-01-01"]
+    states = ["NY", "CA", "NY", "CA", "CA"]
+    response = await client.post(url, json={"dates": dates, "states": states})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [True, True, False, False, False]
+
+    response = await client.post(
+        url, json={"dates": dates, "states": states, "names": True}
+    )
+    names = response.json()
+
+    assert "Testing National Day" in names[0]
+    assert "Testing Local Day" in names[1]
+    assert names[2:] == [None, None, None]
+
+    days = [
+        (date.fromisoformat(holiday_date) - date(1970, 1, 1)).days
+        for holiday_date in dates
+    ]
+    body = (
+        len(days).to_bytes(4, "little")
+        + b"".join(day.to_bytes(4, "little", signed=True) for day in days)
+        + bytes(us_states.index(state_name) for state_name in states)
+    )
+    response = await client.post(
+        url, content=body, headers={"Content-Type": "application/octet-stream"}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Type"] == "application/octet-stream"
+    assert response.content == bytes([1, 1, 0, 0, 0])
+
+    for kwargs, status_code in (
+        ({"json": {"dates": dates, "states": ["OO"] * 5}}, 404),
+        ({"json": {"dates": dates, "states": states[:2]}}, 422),
+        ({"json": {"dates": ["2025-13-01"], "states": ["CA"]}}, 422),
+        (
+            {
+                "content": body[:-1],
+                "headers": {"Content-Type": "application/octet-stream"},
+            },
+            422,
+        ),
+        (
+            {
+                "content": body[:-1] + bytes([200]),
+                "headers": {"Content-Type": "application/octet-stream"},
+            },
+            404,
+        ),
+    ):
+        response = await client.post(url, **kwargs)
+
+        assert response.status_code == status_code
+
+
+@pytest.mark.asyncio(loop_scope="module")
+@pytest.mark.parametrize("index_enabled", [True, False])
+async def test_nearest_holidays(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+    index_enabled: bool,
+):
+    monkeypatch.setattr(settings, "HOLIDAYS_INDEX_ENABLED", index_enabled)
+    url = "http://127.0.0.1:8000/holidays"
+    holidays = [
+        (holiday.date.isoformat(), holiday.name)
+        for holiday in await db_session.scalars(
+            select(Holiday)
+            .where(Holiday.states.any(HolidayState.state.has(name="AL")))
+            .order_by(Holiday.date, Holiday.id)
+        )
+    ]
+    await db_session.commit()
+
+    for request_string, expected in (
+        (
+            "next?date=2025-03-12&state=AL&n=2",
+            [holiday for holiday in holidays if holiday[0] >= "2025-03-12"][:2],
+        ),
+        (
+            "previous?date=2025-10-10&state=AL&n=5",
+            [holiday for holiday in holidays[::-1] if holiday[0] < "2025-10-10"][:5],
+        ),
+        ("previous?date=1990-01-01&state=AL", []),
+    ):
+        response = await client.get(f"{url}/{request_string}")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [
+            (holiday["date"], holiday["name"]) for holiday in response.json()
+        ] == expected
+
+    assert ("2025-03-12", "Testing National Day") in holidays
+    assert ("2025-10-10", "Testing Local Day") in holidays
+
+    response = await client.get(f"{url}/next?date=2025-03-13")
+
+    assert len(response.json()) == 1
+    assert response.json()[0]["date"] >= "2025-03-13"
+
+    response = await client.get(f"{url}/next?date=2025-03-12&state=OO")
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    response = await client.get(f"{url}/previous?date=2025-03-12&n=0")
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
 @pytest.mark.asyncio(loop_scope="module")
 class TestUnauthorized:
     async def test_create_holiday(self, client: AsyncClient):
@@ -97,6 +296,11 @@ class TestUnauthorized:
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
         assert response.json() == {"detail": "Unauthorized"}
 
+    async def test_get_holidays_cache_stats(self, client: AsyncClient):
+        response = await client.get("http://127.0.0.1:8000/holidays/cache/stats")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
 
 @pytest.mark.asyncio(loop_scope="module")
 class TestAuthorized:
@@ -156,6 +360,348 @@ class TestAuthorized:
                     "detail": f"Holiday with the name: {new_holiday['name']} already exists in database"
                 }
 
+    async def test_get_holidays_etag(
+        self, client: AsyncClient, db_session: AsyncSession, get_jwt
+    ):
+        url = "http://127.0.0.1:8000/holidays?year=2025&month=10"
+        response = await client.get(url)
+        etag = response.headers["ETag"]
+
+        assert response.status_code == status.HTTP_200_OK
+
+        response = await client.get(url, headers={"If-None-Match": etag})
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.headers["ETag"] == etag
+        assert response.content == b""
+
+        response = await client.get(
+            url, headers={"If-None-Match": f'"0-stale", W/{etag}'}
+        )
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        response = await client.get(
+            "http://127.0.0.1:8000/holidays?year=2025&month=11",
+            headers={"If-None-Match": etag},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["ETag"] != etag
+
+        response = await client.post(
+            url="http://127.0.0.1:8000/holidays",
+            headers={"Authorization": "Bearer " + get_jwt},
+            json={"name": "Test ETag Day", "date": "2025-10-20", "states": ["CA"]},
+        )
+        response = await client.get(url, headers={"If-None-Match": etag})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["ETag"] != etag
+        assert "Test ETag Day" in [holiday["name"] for holiday in response.json()]
+
+        db_holiday = await db_session.scalar(
+            select(Holiday).filter_by(name="Test ETag Day")
+        )
+        response = await client.delete(
+            url=f"http://127.0.0.1:8000/holidays/{db_holiday.id}",
+            headers={"Authorization": "Bearer " + get_jwt},
+        )
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    async def test_get_holidays_cache_stats(self, client: AsyncClient, get_jwt):
+        response = await client.get(
+            "http://127.0.0.1:8000/holidays/cache/stats",
+            headers={"Authorization": "Bearer " + get_jwt},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["hits"] == holidays_cache.hits
+
+    async def test_get_holidays_other_process_changes(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        monkeypatch: pytest.MonkeyPatch,
+        get_jwt,
+    ):
+        url = "http://127.0.0.1:8000/holidays?year=2025&month=10"
+        monkeypatch.setattr(dataset_version, "ttl", None)
+        response = await client.get(url)
+        etag = response.headers["ETag"]
+
+        # другой процесс приложения меняет данные и версию, не трогая этот
+        db_session.add(
+            Holiday(
+                name="Other Process Day",
+                date=date(2025, 10, 21),
+                custom=True,
+                type=HolidayTypeEnum.local,
+            )
+        )
+        await dataset_version.bump(db_session)
+        await db_session.commit()
+        response = await client.get(url, headers={"If-None-Match": etag})
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        monkeypatch.setattr(dataset_version, "ttl", 0)
+        response = await client.get(url, headers={"If-None-Match": etag})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["ETag"] != etag
+        assert "Other Process Day" in [holiday["name"] for holiday in response.json()]
+
+        db_holiday = await db_session.scalar(
+            select(Holiday).filter_by(name="Other Process Day")
+        )
+        await db_session.commit()
+        response = await client.delete(
+            url=f"http://127.0.0.1:8000/holidays/{db_holiday.id}",
+            headers={"Authorization": "Bearer " + get_jwt},
+        )
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert "Other Process Day" not in [
+            holiday["name"] for holiday in (await client.get(url)).json()
+        ]
+
+    async def test_business_days(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        monkeypatch: pytest.MonkeyPatch,
+        get_jwt,
+    ):
+        url = "http://127.0.0.1:8000/holidays/business-days?state={}&start=2025-10-06&end=2025-10-12"
+        offset_url = "http://127.0.0.1:8000/holidays/add-business-days?state=CA&start=2025-10-07&days=1"
+        monkeypatch.setattr(dataset_version, "ttl", None)
+        response = await client.get(url.format("CA"))
+        business_days = response.json()["business_days"]
+        ny_business_days = (await client.get(url.format("NY"))).json()["business_days"]
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            "state": "CA",
+            "start": "2025-10-06",
+            "end": "2025-10-12",
+            "business_days": business_days,
+        }
+
+        response = await client.post(
+            url="http://127.0.0.1:8000/holidays",
+            headers={"Authorization": "Bearer " + get_jwt},
+            json={"name": "Business Test Day", "date": "2025-10-08", "states": ["CA"]},
+        )
+        with assert_max_queries(0):
+            response = await client.get(url.format("CA"))
+
+        assert response.json()["business_days"] == business_days - 1
+        assert (await client.get(url.format("NY"))).json()[
+            "business_days"
+        ] == ny_business_days
+
+        response = await client.get(offset_url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["date"] == "2025-10-09"
+
+        db_holiday = await db_session.scalar(
+            select(Holiday).filter_by(name="Business Test Day")
+        )
+        await db_session.commit()
+        await client.delete(
+            url=f"http://127.0.0.1:8000/holidays/{db_holiday.id}",
+            headers={"Authorization": "Bearer " + get_jwt},
+        )
+        response = await client.get(url.format("CA"))
+
+        assert response.json()["business_days"] == business_days
+        assert (await client.get(offset_url)).json()["date"] == "2025-10-08"
+
+        for bad_url in (
+            url.format("OO"),
+            "http://127.0.0.1:8000/holidays/business-days?state=CA&start=2025-10-12&end=2025-10-06",
+            "http://127.0.0.1:8000/holidays/add-business-days?state=CA&start=9999-12-30&days=5",
+        ):
+            response = await client.get(bad_url)
+
+            assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    async def test_get_holidays_snapshot(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        get_jwt,
+        monkeypatch: pytest.MonkeyPatch,
+        tmp_path: Path,
+    ):
+        monkeypatch.setattr(snapshot_store, "directory", tmp_path)
+        snapshot_store.clear()
+        year_url = (
+            "http://127.0.0.1:8000/holidays?start_date=2025-01-01&end_date=2025-12-31"
+        )
+
+        response = await client.get("http://127.0.0.1:8000/holidays/snapshots/2025")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.json() == (await client.get(year_url)).json()
+
+        response = await client.get(
+            "http://127.0.0.1:8000/holidays/snapshots/2025/CA",
+            headers={"Accept-Encoding": "identity"},
+        )
+
+        assert "Content-Encoding" not in response.headers
+        assert (
+            response.content == (await client.get(year_url + "&state__name=CA")).content
+        )
+
+        for url in (
+            "http://127.0.0.1:8000/holidays/snapshots/1990",
+            "http://127.0.0.1:8000/holidays/snapshots/2025/OO",
+        ):
+            assert (await client.get(url)).status_code == status.HTTP_404_NOT_FOUND
+
+        await client.get("http://127.0.0.1:8000/holidays/snapshots/2025/NY")
+        ny_paths = list((tmp_path / "2025").glob("NY.*.json"))
+        ny_modified = ny_paths[0].stat().st_mtime_ns
+        await client.post(
+            url="http://127.0.0.1:8000/holidays",
+            headers={"Authorization": "Bearer " + get_jwt},
+            json={"name": "Test Snapshot Day", "date": "2025-08-01", "states": ["CA"]},
+        )
+
+        response = await client.get("http://127.0.0.1:8000/holidays/snapshots/2025/CA")
+
+        assert "Test Snapshot Day" in [holiday["name"] for holiday in response.json()]
+
+        await client.get("http://127.0.0.1:8000/holidays/snapshots/2025/NY")
+
+        # снимки других штатов не пересобираются под новой версией
+        assert list((tmp_path / "2025").glob("NY.*.json")) == ny_paths
+        assert ny_paths[0].stat().st_mtime_ns == ny_modified
+
+        db_holiday = await db_session.scalar(
+            select(Holiday).filter_by(name="Test Snapshot Day")
+        )
+        await client.delete(
+            url=f"http://127.0.0.1:8000/holidays/{db_holiday.id}",
+            headers={"Authorization": "Bearer " + get_jwt},
+        )
+        snapshot_store.clear()
+
+    async def test_create_holidays_bulk(self, client: AsyncClient, get_jwt):
+        response = await client.post(
+            url="http://127.0.0.1:8000/holidays/bulk",
+            headers={"Authorization": "Bearer " + get_jwt},
+            json=[
+                {"name": "Test Bulk Day", "date": "2025-07-01", "states": ["CA", "NY"]},
+                {"name": "Testing Local Day", "date": "2025-07-02", "states": ["CA"]},
+                {"name": "Test Bulk Day 2", "date": "2025-07-03", "states": ["OO"]},
+                {"name": "Test Bulk Day", "date": "2025-07-04", "states": ["TX"]},
+                {"name": "Test Bulk Day 3", "date": "2025-07-05", "states": ["TX"]},
+            ],
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+
+        result = response.json()
+
+        assert len(result["created"]) == 2
+        assert result["conflicts"] == [
+            {
+                "index": 1,
+                "name": "Testing Local Day",
+                "detail": "Holiday with the name: Testing Local Day already exists in database",
+            },
+            {
+                "index": 2,
+                "name": "Test Bulk Day 2",
+                "detail": "No such state exists in database",
+            },
+            {
+                "index": 3,
+                "name": "Test Bulk Day",
+                "detail": "Holiday with the name: Test Bulk Day already exists in database",
+            },
+        ]
+
+        response = await client.get(
+            "http://127.0.0.1:8000/holidays?start_date=2025-07-01&end_date=2025-07-31"
+        )
+
+        assert response.json() == [
+            {"name": "Test Bulk Day", "date": "2025-07-01", "states": ["CA", "NY"]},
+            {"name": "Test Bulk Day 3", "date": "2025-07-05", "states": ["TX"]},
+        ]
+
+        for id in result["created"]:
+            response = await client.delete(
+                url=f"http://127.0.0.1:8000/holidays/{id}",
+                headers={"Authorization": "Bearer " + get_jwt},
+            )
+
+            assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    async def test_holiday_partitions_created(
+        self, client: AsyncClient, db_session: AsyncSession, get_jwt
+    ):
+        """
+        Секция года создаётся при первой записи праздника с такой датой,
+        смена года при обновлении переносит праздник и его штаты
+        в новую секцию, удаление праздника удаляет и штаты
+        """
+        headers = {"Authorization": "Bearer " + get_jwt}
+        response = await client.post(
+            url="http://127.0.0.1:8000/holidays",
+            headers=headers,
+            json={"name": "Partition Day", "date": "2131-05-01", "states": ["CA"]},
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        id = await db_session.scalar(select(Holiday.id).filter_by(name="Partition Day"))
+        # транзакция теста не должна держать блокировки во время записи
+        await db_session.commit()
+
+        response = await client.put(
+            url=f"http://127.0.0.1:8000/holidays/{id}",
+            headers=headers,
+            json={
+                "name": "Partition Day",
+                "date": "2132-05-01",
+                "states": ["CA", "NY"],
+            },
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        assert {2131, 2132} <= await get_partition_years(db_session)
+        holiday_dates = await db_session.execute(
+            select(Holiday.date, HolidayState.holiday_date)
+            .join(HolidayState)
+            .filter(Holiday.id == id)
+        )
+        assert set(holiday_dates) == {(date(2132, 5, 1), date(2132, 5, 1))}
+        await db_session.commit()
+
+        response = await client.get(
+            url="http://127.0.0.1:8000/holidays?year=2132&month=05"
+        )
+        assert [holiday["name"] for holiday in response.json()] == ["Partition Day"]
+
+        response = await client.delete(
+            url=f"http://127.0.0.1:8000/holidays/{id}", headers=headers
+        )
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert (
+            await db_session.scalar(
+                select(func.count()).select_from(HolidayState).filter_by(holiday_id=id)
+            )
+            == 0
+        )
+        await db_session.commit()
+
     @pytest.mark.parametrize(
         "new_holiday, status_code, case",
         [
@@ -277,3 +823,45 @@ class TestAuthorized:
                 assert response.json() == {
                     "detail": f"Holiday with id {id} was not found"
                 }
+
+
+@pytest.mark.asyncio(loop_scope="module")
+@pytest.mark.parametrize(
+    "index_enabled, query_mode, max_statements",
+    [(True, "orm", 0), (False, "orm", 2), (False, "aggregate", 1)],
+)
+async def test_get_holidays_statements(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+    index_enabled: bool,
+    query_mode: str,
+    max_statements: int,
+):
+    if (
+        await db_session.scalar(
+            select(Holiday.id).filter(Holiday.name.startswith("Synthetic Day")).limit(1)
+        )
+        is None
+    ):
+        await load_dataset(db_session, 500)
+        holiday_index.clear()
+    monkeypatch.setattr(settings, "HOLIDAYS_INDEX_ENABLED", index_enabled)
+    monkeypatch.setattr(settings, "HOLIDAYS_QUERY_MODE", query_mode)
+    monkeypatch.setattr(settings, "DEBUG", True)
+    # версия данных и индекс загружаются первым запросом, версия не перечитывается
+    monkeypatch.setattr(dataset_version, "ttl", None)
+    await client.get("http://127.0.0.1:8000/holidays?limit=1")
+
+    for url in (
+        "http://127.0.0.1:8000/holidays",
+        "http://127.0.0.1:8000/holidays?year=2010&month=05",
+        "http://127.0.0.1:8000/holidays?state__name__in=CA%2CNY",
+        "http://127.0.0.1:8000/holidays?start_date=2000-01-01&end_date=2009-12-31&limit=100",
+    ):
+        holidays_cache.invalidate()
+        with assert_max_queries(max_statements) as query_stats:
+            response = await client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["X-SQL-Statements"] == str(query_stats.statements)
@@ -0,0 +1,95 @@
+from fastapi_users.db import SQLAlchemyUserDatabase
+from fastapi_users.jwt import generate_jwt
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# стратегия и кэш живут в модулях, импортированных приложением без префикса src.usholidays
+from auth.cache import users_cache
+from auth.dependencies import get_jwt_strategy
+from auth.dependencies.user_manager import UserManager
+from auth.models import User
+from auth.schemas import UserUpdate
+
+from fastapi import status
+from httpx import AsyncClient
+from types import SimpleNamespace
+import pytest
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_jwt_strategy_verified_tokens():
+    strategy = get_jwt_strategy()
+    strategy.verified_tokens.invalidate()
+    token = await strategy.write_token(SimpleNamespace(id=42))  # type: ignore
+
+    assert get_jwt_strategy() is strategy
+    assert strategy.get_user_id(token) == "42"
+
+    hits = strategy.verified_tokens.hits
+
+    assert strategy.get_user_id(token) == "42"
+    assert strategy.verified_tokens.hits == hits + 1
+
+    strategy.reload_keys()
+
+    assert len(strategy.verified_tokens) == 0
+    assert strategy.get_user_id(token) == "42"
+
+
+@pytest.mark.parametrize(
+    "case",
+    [1, 2],
+)
+def test_jwt_strategy_rejects_token(case: int):
+    strategy = get_jwt_strategy()
+    match case:
+        case 1:
+            token = generate_jwt(
+                {"sub": "42", "aud": strategy.token_audience},
+                strategy.encode_key,
+                lifetime_seconds=-10,
+                algorithm=strategy.algorithm,
+            )
+        case 2:
+            token = generate_jwt(
+                {"sub": "42", "aud": strategy.token_audience},
+                "another secret",
+                lifetime_seconds=60,
+            )
+
+    assert strategy.get_user_id(token) is None
+    assert strategy.verified_tokens.get(token) is None
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_users_cache(client: AsyncClient, db_session: AsyncSession, get_jwt):
+    headers = {"Authorization": "Bearer " + get_jwt}
+    url = "http://127.0.0.1:8000/holidays/100500"
+
+    response = await client.delete(url, headers=headers)
+    hits = users_cache.hits
+    response = await client.delete(url, headers=headers)
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert users_cache.hits == hits + 1
+
+    response = await client.get("http://127.0.0.1:8000/auth/cache/stats")
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    response = await client.get(
+        "http://127.0.0.1:8000/auth/cache/stats", headers=headers
+    )
+
+    assert response.json()["hits"] == users_cache.hits
+
+    user_manager = UserManager(SQLAlchemyUserDatabase(db_session, User))
+    user = await user_manager.get_by_email("user@example.com")
+    await user_manager.update(UserUpdate(is_active=False), user)
+    response = await client.delete(url, headers=headers)
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    await user_manager.update(UserUpdate(is_active=True), user)
+    response = await client.delete(url, headers=headers)
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,54 @@
+# метрики живут в модуле, импортированном приложением без префикса src.usholidays
+from core.metrics import Histogram
+
+from fastapi import status
+from httpx import AsyncClient
+import pytest
+
+
+def test_histogram_render():
+    histogram = Histogram("latency_seconds", "Latency", ["route"], buckets=(0.1, 1))
+    histogram.observe(0.1, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(3, "/a")
+
+    assert histogram.render().splitlines() == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a",le="1"} 2',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 3',
+        'latency_seconds_sum{route="/a"} 3.6',
+        'latency_seconds_count{route="/a"} 3',
+    ]
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_metrics(client: AsyncClient):
+    await client.get("http://127.0.0.1:8000/holidays?year=2025&month=10")
+    response = await client.get("http://127.0.0.1:8000/metrics")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+
+    samples = dict(
+        line.rsplit(" ", 1)
+        for line in response.text.splitlines()
+        if not line.startswith("#")
+    )
+
+    assert (
+        int(
+            samples[
+                'http_request_duration_seconds_count{method="GET",route="/holidays",status="200"}'
+            ]
+        )
+        >= 1
+    )
+    assert (
+        float(samples['db_statements_per_request_sum{method="GET",route="/holidays"}'])
+        >= 1
+    )
+    assert samples['http_requests_in_flight{method="GET"}'] == "1.0"
+    assert 'db_pool_connections{state="checked_out"}' in samples
+    assert 'cache_hit_ratio{cache="holidays"}' in samples
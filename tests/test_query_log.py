@@ -0,0 +1,74 @@
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy import select, text
+from sqlalchemy.exc import DBAPIError
+
+from src.usholidays.core.config import settings
+from src.usholidays.core.query_log import (
+    get_statement_fingerprint,
+    install_query_log,
+    normalize_statement,
+    track_queries,
+)
+from src.usholidays.countryholidays.models import Holiday
+
+import logging
+import pytest
+
+
+def test_normalize_statement():
+    assert (
+        normalize_statement(
+            "SELECT holidays.id\nFROM holidays\nWHERE holidays.id"
+            " IN ($1::INTEGER, $2::INTEGER) AND holidays.name = $3::VARCHAR"
+        )
+        == "SELECT holidays.id FROM holidays WHERE holidays.id IN (...)"
+        " AND holidays.name = ?"
+    )
+    assert get_statement_fingerprint(
+        "SELECT 1 WHERE x IN ($1)"
+    ) == get_statement_fingerprint("SELECT 1  WHERE x IN ($1, $2)")
+
+
+@pytest.mark.asyncio(loop_scope="module")
+@pytest.mark.parametrize("threshold, logged", [(0, True), (60, False)])
+async def test_slow_query_log(
+    caplog: pytest.LogCaptureFixture, threshold: float, logged: bool
+):
+    engine = create_async_engine(settings.db_url)
+    install_query_log(engine.sync_engine, threshold)
+
+    with caplog.at_level(logging.WARNING, logger="usholidays.slow_queries"):
+        async with engine.connect() as conn:
+            await conn.execute(select(Holiday.id).where(Holiday.id.in_([1, 2, 3])))
+    await engine.dispose()
+
+    records = [
+        record for record in caplog.records if record.name == "usholidays.slow_queries"
+    ]
+    if not logged:
+        assert records == []
+        return
+
+    assert len(records) == 1
+    assert records[0].rowcount == 2  # type: ignore
+    assert records[0].fingerprint == get_statement_fingerprint(  # type: ignore
+        "SELECT holidays.id FROM holidays WHERE holidays.id IN ($1, $2, $3)"
+    )
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_failed_query_is_counted():
+    engine = create_async_engine(settings.db_url)
+    install_query_log(engine.sync_engine)
+
+    with track_queries() as query_stats:
+        async with engine.connect() as conn:
+            with pytest.raises(DBAPIError):
+                await conn.execute(text("SELECT 1 / 0"))
+            await conn.rollback()
+            await conn.execute(select(Holiday.id).limit(1))
+            started = conn.sync_connection.info.get("query_started")  # type: ignore
+    await engine.dispose()
+
+    assert started == []
+    assert query_stats.statements == 2
@@ -0,0 +1,186 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects import postgresql
+from sqlalchemy import text
+
+from src.usholidays.countryholidays.utils import HolidayFilter, StateFilter
+from src.usholidays.countryholidays.services import (
+    get_holidays_aggregate_stmt,
+    get_holidays_stmt,
+    get_nearest_holidays_stmt,
+)
+
+from datetime import date
+import pytest
+import re
+
+
+PARTITION_YEAR = re.compile(r"\bholidays_y(\d{4})\b")
+
+
+async def explain(session: AsyncSession, stmt) -> str:
+    compiled = stmt.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    result = await session.execute(text(f"EXPLAIN {compiled}"))
+    return "\n".join(result.scalars())
+
+
+@pytest.mark.asyncio(loop_scope="module")
+@pytest.mark.parametrize(
+    "apiFilter, year, month, start, end, after, limit",
+    [
+        (HolidayFilter(), "2010", "05", None, None, None, None),
+        (HolidayFilter(), None, None, date(2010, 5, 1), date(2010, 6, 15), None, None),
+        (HolidayFilter(name="Synthetic Day 777"), None, None, None, None, None, None),
+        (
+            HolidayFilter(states=StateFilter(name="NY")),
+            "2010",
+            "05",
+            None,
+            None,
+            None,
+            None,
+        ),
+        (
+            HolidayFilter(states=StateFilter(name__in=["CA", "AL"])),
+            None,
+            None,
+            date(2010, 5, 1),
+            date(2010, 6, 15),
+            None,
+            None,
+        ),
+        (HolidayFilter(), None, None, None, None, (date(2010, 5, 1), 100), 50),
+        (
+            HolidayFilter(custom=True),
+            "2010",
+            "05",
+            None,
+            None,
+            (date(2010, 5, 10), 100),
+            50,
+        ),
+    ],
+)
+async def test_list_queries_use_indexes(
+    synthetic_holidays: int,
+    db_session: AsyncSession,
+    apiFilter: HolidayFilter,
+    year: str,
+    month: str,
+    start: date,
+    end: date,
+    after: tuple[date, int] | None,
+    limit: int | None,
+):
+    """
+    Ограниченные датой, именем или курсором запросы не должны читать
+    holidays и holidays_states целиком. Запрос без фильтров и без limit
+    не проверяется: ему полное чтение таблицы необходимо
+    """
+    plan = await explain(
+        db_session,
+        get_holidays_stmt(apiFilter, year, month, start, end, after, limit),
+    )
+
+    assert "Seq Scan on holidays" not in plan, plan
+
+
+@pytest.mark.asyncio(loop_scope="module")
+@pytest.mark.parametrize("get_stmt", [get_holidays_stmt, get_holidays_aggregate_stmt])
+@pytest.mark.parametrize(
+    "apiFilter, year, month, start, end, after, limit, years",
+    [
+        (HolidayFilter(), "2010", "05", None, None, None, None, {2010}),
+        (HolidayFilter(), "2010", "12", None, None, None, None, {2010}),
+        (
+            HolidayFilter(),
+            None,
+            None,
+            date(2010, 5, 1),
+            date(2010, 6, 15),
+            None,
+            None,
+            {2010},
+        ),
+        (
+            HolidayFilter(),
+            None,
+            None,
+            date(2009, 12, 20),
+            date(2010, 1, 10),
+            None,
+            None,
+            {2009, 2010},
+        ),
+        (
+            HolidayFilter(states=StateFilter(name="NY")),
+            "2010",
+            "05",
+            None,
+            None,
+            None,
+            None,
+            {2010},
+        ),
+        (
+            HolidayFilter(),
+            None,
+            None,
+            None,
+            None,
+            (date(2049, 12, 1), 100),
+            50,
+            {2049, 2050},
+        ),
+    ],
+)
+async def test_period_queries_prune_partitions(
+    synthetic_holidays: int,
+    db_session: AsyncSession,
+    get_stmt,
+    apiFilter: HolidayFilter,
+    year: str,
+    month: str,
+    start: date,
+    end: date,
+    after: tuple[date, int] | None,
+    limit: int | None,
+    years: set[int],
+):
+    """
+    Запросы за период и после курсора читают только секции своих лет
+    """
+    plan = await explain(
+        db_session, get_stmt(apiFilter, year, month, start, end, after, limit)
+    )
+
+    assert {int(year) for year in PARTITION_YEAR.findall(plan)} == years, plan
+
+
+@pytest.mark.asyncio(loop_scope="module")
+@pytest.mark.parametrize(
+    "day, state_name, previous, years",
+    [
+        (date(2049, 12, 1), None, False, {2049, 2050}),
+        (date(2049, 12, 1), "NY", False, {2049, 2050}),
+        (date(1991, 1, 10), "CA", True, {1990, 1991}),
+    ],
+)
+async def test_nearest_queries_use_indexes(
+    synthetic_holidays: int,
+    db_session: AsyncSession,
+    day: date,
+    state_name: str | None,
+    previous: bool,
+    years: set[int],
+):
+    """
+    Ближайшие праздники читаются по индексу, начиная с секции года даты
+    """
+    plan = await explain(
+        db_session, get_nearest_holidays_stmt(day, 10, state_name, previous)
+    )
+
+    assert "Seq Scan on holidays" not in plan, plan
+    assert {int(year) for year in PARTITION_YEAR.findall(plan)} == years, plan
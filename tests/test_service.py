@@ -1,17 +1,47 @@
-from sqlalchemy import select
+from sqlalchemy import delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 
-from src.usholidays.countryholidays.models import Holiday, HolidayState
+from src.usholidays.countryholidays.models import (
+    DatasetVersion,
+    Holiday,
+    HolidayState,
+)
 from src.usholidays.core.models import HolidayTypeEnum
-from src.usholidays.countryholidays.utils import HolidayFilter
+from src.usholidays.countryholidays.utils import (
+    HolidayFilter,
+    StateFilter,
+    encode_cursor,
+)
 from src.usholidays.countryholidays.services import (
     get_holidays_service,
     create_holiday_service,
     update_holiday_by_id_service,
     delete_holiday_by_id_service,
 )
+from countryholidays.cache import holidays_cache
+from core.config import settings
+from src.usholidays.countryholidays.seeding import (
+    build_seed_rows,
+    compute_state_holidays,
+    resync_db,
+)
+from src.usholidays.countryholidays.index import (
+    STATE_BITS,
+    HolidayIndex,
+    HolidayRecord,
+    encode_holidays,
+)
+from src.usholidays.countryholidays.businessdays import BusinessCalendar
+from src.usholidays.countryholidays.nearest import StateHolidays
+from src.usholidays.countryholidays.snapshots import SnapshotStore
+from src.usholidays.countryholidays.version import DatasetVersionTracker
+from src.usholidays.countryholidays.lookup import (
+    EPOCH_ORDINAL,
+    STATE_INDEXES,
+    HolidayMatrix,
+)
 from src.usholidays.countryholidays.schemas import (
     HolidaySchema,
     HolidayCreateSchema,
@@ -20,11 +50,15 @@ from src.usholidays.countryholidays.schemas import (
 
 from httpx import AsyncClient
 from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from pathlib import Path
 
 # from contextlib import nullcontext
 import pytest
 import json
-from datetime import date
+import random
+from datetime import date, timedelta
 
 
 @pytest.mark.asyncio(loop_scope="module")
@@ -98,6 +132,127 @@ async def test_get_holidays_service(
                 assert e.detail == "Wrong path parameters"
 
 
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_holidays_service_cache(db_session: AsyncSession):
+    holidays_cache.invalidate()
+    hits = holidays_cache.hits
+
+    first_list = await get_holidays_service(
+        session=db_session, apiFilter=HolidayFilter()
+    )
+    second_list = await get_holidays_service(
+        session=db_session, apiFilter=HolidayFilter()
+    )
+
+    assert second_list is first_list
+    assert holidays_cache.hits == hits + 1
+
+    created_holiday = await create_holiday_service(
+        session=db_session,
+        holiday_in=HolidayCreateSchema(
+            name="Testing Cache Day", date=date(2025, 8, 1), states=["CA"]
+        ),
+    )
+    holiday_list = await get_holidays_service(
+        session=db_session, apiFilter=HolidayFilter()
+    )
+
+    assert len(holiday_list) == len(first_list) + 1
+
+    await delete_holiday_by_id_service(db_session, created_holiday.id)
+    holiday_list = await get_holidays_service(
+        session=db_session, apiFilter=HolidayFilter()
+    )
+
+    assert len(holiday_list) == len(first_list)
+
+
+@pytest.mark.asyncio(loop_scope="module")
+@pytest.mark.parametrize(
+    "apiFilter, year, month, start, end",
+    [
+        (HolidayFilter(), None, None, None, None),
+        (HolidayFilter(), "2025", "03", None, None),
+        (HolidayFilter(), None, None, date(2025, 3, 12), date(2025, 10, 10)),
+        (HolidayFilter(custom=True), None, None, None, None),
+        (HolidayFilter(type=HolidayTypeEnum.national), None, None, None, None),
+        (HolidayFilter(name="Testing Local Day"), "2025", "10", None, None),
+        (HolidayFilter(states=StateFilter(name="NY")), None, None, None, None),
+        (
+            HolidayFilter(states=StateFilter(name__in=["CA", "WY"])),
+            None,
+            None,
+            date(2025, 1, 1),
+            date(2025, 12, 31),
+        ),
+    ],
+)
+@pytest.mark.parametrize("query_mode", ["orm", "aggregate"])
+async def test_get_holidays_service_index_matches_db(
+    db_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+    query_mode: str,
+    apiFilter: HolidayFilter,
+    year: str,
+    month: str,
+    start: date,
+    end: date,
+):
+    holidays_cache.invalidate()
+    index_list = await get_holidays_service(
+        db_session, apiFilter, year=year, month=month, start=start, end=end
+    )
+
+    holidays_cache.invalidate()
+    monkeypatch.setattr(settings, "HOLIDAYS_INDEX_ENABLED", False)
+    monkeypatch.setattr(settings, "HOLIDAYS_QUERY_MODE", query_mode)
+    db_list = await get_holidays_service(
+        db_session, apiFilter, year=year, month=month, start=start, end=end
+    )
+    holidays_cache.invalidate()
+
+    assert [
+        HolidaySchema.model_validate(holiday).model_dump() for holiday in index_list
+    ] == [HolidaySchema.model_validate(holiday).model_dump() for holiday in db_list]
+
+
+@pytest.mark.asyncio(loop_scope="module")
+@pytest.mark.parametrize(
+    "index_enabled, query_mode",
+    [(True, "orm"), (False, "orm"), (False, "aggregate")],
+)
+async def test_get_holidays_service_pagination(
+    db_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+    index_enabled: bool,
+    query_mode: str,
+):
+    monkeypatch.setattr(settings, "HOLIDAYS_INDEX_ENABLED", index_enabled)
+    monkeypatch.setattr(settings, "HOLIDAYS_QUERY_MODE", query_mode)
+    holidays_cache.invalidate()
+
+    first_page = await get_holidays_service(db_session, HolidayFilter(), limit=1)
+    second_page = await get_holidays_service(
+        db_session,
+        HolidayFilter(),
+        limit=1,
+        cursor=encode_cursor(first_page[0].date, first_page[0].id),
+    )
+    last_page = await get_holidays_service(
+        db_session,
+        HolidayFilter(),
+        limit=1,
+        cursor=encode_cursor(second_page[0].date, second_page[0].id),
+    )
+    holidays_cache.invalidate()
+
+    assert [holiday.name for holiday in first_page + second_page] == [
+        "Testing National Day",
+        "Testing Local Day",
+    ]
+    assert last_page == []
+
+
 @pytest.mark.asyncio(loop_scope="module")
 @pytest.mark.parametrize(
     "holiday, case",
@@ -267,3 +422,449 @@ async def test_delete_holiday_by_id_service(db_session: AsyncSession, case: int)
             case 3:
                 assert e.status_code == status.HTTP_404_NOT_FOUND
                 assert e.detail == f"Holiday with id {id} was not found"
+
+
+def test_build_seed_rows():
+    holiday_rows, holiday_states = build_seed_rows(
+        [
+            (
+                "AL",
+                [
+                    (date(2025, 1, 1), "New Year's Day"),
+                    (
+                        date(2025, 1, 20),
+                        "Martin Luther King Jr. Day & Robert E. Lee's Birthday",
+                    ),
+                ],
+            ),
+            ("AK", [(date(2025, 1, 1), "New Year's Day")]),
+        ]
+    )
+
+    assert holiday_rows == [
+        ("New Year's Day", date(2025, 1, 1), HolidayTypeEnum.national),
+        ("Martin Luther King Jr. Day", date(2025, 1, 20), HolidayTypeEnum.national),
+        ("Robert E. Lee's Birthday", date(2025, 1, 20), HolidayTypeEnum.local),
+    ]
+    assert holiday_states == [(0, 0), (1, 0), (2, 0), (0, 1)]
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_compute_state_holidays():
+    serial = await compute_state_holidays(range(2024, 2026), workers=1)
+    parallel = await compute_state_holidays(range(2024, 2026), workers=2)
+
+    assert parallel == serial
+    assert [state_name for state_name, _ in serial[:2]] == ["AL", "AL"]
+    assert {holiday_date.year for holiday_date, _ in serial[0][1]} == {2024}
+
+
+def test_encode_holidays_matches_schema():
+    records = [
+        HolidayRecord(
+            id=1,
+            name="New Year's Day",
+            date=date(2025, 1, 1),
+            custom=False,
+            type=HolidayTypeEnum.national,
+            mask=(1 << 50) - 1,
+        ),
+        HolidayRecord(
+            id=2,
+            name='Día "de" la\\Raza\n',
+            date=date(2025, 10, 13),
+            custom=True,
+            type=HolidayTypeEnum.local,
+            mask=0b101,
+        ),
+        HolidayRecord(
+            id=3,
+            name="Stateless",
+            date=date(2025, 12, 31),
+            custom=True,
+            type=HolidayTypeEnum.local,
+            mask=0,
+        ),
+    ]
+    adapter = TypeAdapter(list[HolidaySchema])
+    expected = JSONResponse(
+        adapter.dump_python(adapter.validate_python(records), mode="json")
+    ).body
+
+    assert encode_holidays(records) == expected
+    assert encode_holidays([]) == b"[]"
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_business_calendar(db_session: AsyncSession):
+    index = HolidayIndex()
+    calendar = BusinessCalendar(index)
+    await index.load(db_session)
+    calendar.build()
+    week_business_days = calendar.count("CA", date(2025, 10, 6), date(2025, 10, 12))
+    # праздник в будний день, совпадающий по дате с уже существующим
+    index.upsert(
+        HolidayRecord(
+            id=-1,
+            name="Calendar Day",
+            date=date(2025, 10, 10),
+            custom=True,
+            type=HolidayTypeEnum.local,
+            mask=STATE_BITS["CA"] | STATE_BITS["NY"],
+        )
+    )
+    rebuilt = BusinessCalendar(index)
+    rebuilt.build()
+
+    rng = random.Random(42)
+    first_day = date(2025, 1, 1)
+    for state_name in ("CA", "NY", "AK"):
+        holiday_dates = {
+            record.date
+            for record in index.between(date.min, date.max)
+            if record.mask & STATE_BITS[state_name]
+        }
+
+        def is_business_day(day: date) -> bool:
+            return day.weekday() < 5 and day not in holiday_dates
+
+        for _ in range(50):
+            start = first_day + timedelta(days=rng.randrange(365))
+            end = start + timedelta(days=rng.randrange(-3, 60))
+            expected = sum(
+                is_business_day(start + timedelta(days=i))
+                for i in range((end - start).days + 1)
+            )
+
+            assert calendar.count(state_name, start, end) == expected
+            assert rebuilt.count(state_name, start, end) == expected
+
+            days = rng.randrange(-20, 21)
+            expected_date = start
+            if days == 0:
+                while not is_business_day(expected_date):
+                    expected_date += timedelta(days=1)
+            for _ in range(abs(days)):
+                expected_date += timedelta(days=1 if days > 0 else -1)
+                while not is_business_day(expected_date):
+                    expected_date += timedelta(days=1 if days > 0 else -1)
+
+            assert calendar.add(state_name, start, days) == expected_date
+
+    index.remove(-1)
+
+    assert (
+        calendar.count("CA", date(2025, 10, 6), date(2025, 10, 12))
+        == week_business_days
+    )
+    with pytest.raises(ValueError):
+        calendar.add("CA", date(9999, 12, 30), 5)
+    with pytest.raises(KeyError):
+        calendar.count("OO", first_day, first_day)
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_holiday_matrix(db_session: AsyncSession):
+    index = HolidayIndex()
+    matrix = HolidayMatrix(index, range(1900, 2101))
+    await index.load(db_session)
+    matrix.build()
+    index.upsert(
+        HolidayRecord(
+            id=-1,
+            name="Matrix Day",
+            date=date(2025, 3, 12),
+            custom=True,
+            type=HolidayTypeEnum.local,
+            mask=STATE_BITS["CA"],
+        )
+    )
+
+    rng = random.Random(42)
+    names: dict[tuple[date, str], list[str]] = {}
+    for record in index.between(date.min, date.max):
+        for holiday_state in record.states:
+            names.setdefault((record.date, holiday_state.state.name), []).append(
+                record.name
+            )
+    pairs = [(holiday_date, state_name) for holiday_date, state_name in names]
+    pairs += [
+        (
+            date(1900, 1, 1) + timedelta(days=rng.randrange(365 * 300)),
+            rng.choice(list(STATE_INDEXES)),
+        )
+        for _ in range(1000)
+    ]
+    days = [holiday_date.toordinal() for holiday_date, _ in pairs]
+    state_indexes = [STATE_INDEXES[state_name] for _, state_name in pairs]
+
+    assert matrix.lookup(days, state_indexes) == bytes(
+        (pair in names) for pair in pairs
+    )
+    assert json.loads(matrix.lookup_names(days, state_indexes)) == [
+        "; ".join(names[pair]) if pair in names else None for pair in pairs
+    ]
+    assert matrix.lookup(
+        [day - EPOCH_ORDINAL for day in days], state_indexes, origin=EPOCH_ORDINAL
+    ) == matrix.lookup(days, state_indexes)
+
+    index.remove(-1)
+    day = date(2025, 3, 12).toordinal()
+
+    assert (
+        "Matrix Day"
+        not in json.loads(matrix.lookup_names([day], [STATE_INDEXES["CA"]]))[0]
+    )
+    assert matrix.lookup([], []) == b""
+    with pytest.raises(ValueError):
+        matrix.lookup([day], [])
+    with pytest.raises(KeyError):
+        matrix.lookup([day], [len(STATE_INDEXES)])
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_holiday_matrix_outside_years(db_session: AsyncSession):
+    index = HolidayIndex()
+    matrix = HolidayMatrix(index, range(2000, 2051))
+    await index.load(db_session)
+    matrix.build()
+    cells_size = len(matrix._cells)
+    for id, holiday_date in ((-1, date.min), (-2, date.max), (-3, date(1999, 12, 31))):
+        index.upsert(
+            HolidayRecord(
+                id=id,
+                name="Outlying Day",
+                date=holiday_date,
+                custom=True,
+                type=HolidayTypeEnum.local,
+                mask=STATE_BITS["CA"],
+            )
+        )
+
+    # даты вне years не растягивают плотную часть матрицы
+    assert matrix.built
+    assert len(matrix._cells) == cells_size
+    days = [
+        holiday_date.toordinal()
+        for holiday_date in (date.min, date.max, date(1999, 12, 31), date(2025, 3, 12))
+    ]
+    ca = STATE_INDEXES["CA"]
+    assert matrix.lookup(days, [ca] * 4) == b"\x01\x01\x01\x01"
+    assert matrix.lookup(days, [STATE_INDEXES["NY"]] * 3 + [ca]) == b"\x00\x00\x00\x01"
+    assert json.loads(matrix.lookup_names(days[:3], [ca] * 3)) == ["Outlying Day"] * 3
+
+    matrix.build()
+    assert len(matrix._cells) == cells_size
+    assert matrix.lookup(days, [ca] * 4) == b"\x01\x01\x01\x01"
+
+    index.remove(-2)
+    assert matrix.lookup(days[:2], [ca] * 2) == b"\x01\x00"
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_snapshot_store(db_session: AsyncSession, tmp_path: Path):
+    index = HolidayIndex()
+    version = DatasetVersionTracker()
+    version.version = 5
+    store = SnapshotStore(index, tmp_path, version)
+    await index.load(db_session)
+
+    assert await store.build_all(db_session)
+    assert await store.get_path((2025, "CA")) == tmp_path / "2025" / "CA.5.json"
+    assert await store.get_path((1990, None)) is None
+
+    ny_path = tmp_path / "2025" / "NY.5.json"
+    ny_modified = ny_path.stat().st_mtime_ns
+    other_version = DatasetVersionTracker()
+    other_version.version = 5
+    other_store = SnapshotStore(index, tmp_path, other_version)
+    async with AsyncSession(db_session.bind) as other_session:
+        # снимки при старте собирает только один процесс
+        assert not await other_store.build_all(other_session)
+
+    # готовый снимок той же версии не перезаписывается
+    assert await other_store.get_path((2025, "NY")) == ny_path
+    assert ny_path.stat().st_mtime_ns == ny_modified
+
+    # процесс с устаревшей версией не трогает более новый снимок
+    other_version.version = 4
+    other_store.clear()
+    assert await other_store.get_path((2025, "NY")) == tmp_path / "2025" / "NY.4.json"
+    assert ny_path.stat().st_mtime_ns == ny_modified
+
+    for id in (-1, -2):
+        index.upsert(
+            HolidayRecord(
+                id=id,
+                name="Snapshot Day",
+                date=date(2025, 3, 12),
+                custom=True,
+                type=HolidayTypeEnum.local,
+                mask=STATE_BITS["CA"],
+            )
+        )
+        version.version += 1
+        path = await store.get_path((2025, "CA"), compressed=True)
+
+        assert path == tmp_path / "2025" / f"CA.{version.version}.json.gz"
+        assert await store.get_path((2025, "NY")) == ny_path
+
+    # остаются текущий снимок и предыдущий
+    assert sorted(path.name for path in (tmp_path / "2025").glob("CA.*")) == [
+        "CA.6.json",
+        "CA.6.json.gz",
+        "CA.7.json",
+        "CA.7.json.gz",
+    ]
+    await db_session.rollback()
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_state_holidays(db_session: AsyncSession):
+    index = HolidayIndex()
+    nearest = StateHolidays(index)
+    await index.load(db_session)
+    nearest.build()
+    for id, holiday_date in ((-1, date(2025, 3, 12)), (-2, date(2025, 3, 13))):
+        index.upsert(
+            HolidayRecord(
+                id=id,
+                name="Nearest Day",
+                date=holiday_date,
+                custom=True,
+                type=HolidayTypeEnum.local,
+                mask=STATE_BITS["CA"],
+            )
+        )
+    index.remove(-2)
+
+    records = index.between(date.min, date.max)
+    for state_name in ("CA", "NY"):
+        state_records = [
+            record for record in records if record.mask & STATE_BITS[state_name]
+        ]
+        for day in (date(1900, 1, 1), date(2025, 3, 12), date(2025, 3, 13)):
+            for n in (1, 3, 1000):
+                assert (
+                    nearest.next(state_name, day, n)
+                    == [record for record in state_records if record.date >= day][:n]
+                )
+                assert (
+                    nearest.previous(state_name, day, n)
+                    == [
+                        record
+                        for record in reversed(state_records)
+                        if record.date < day
+                    ][:n]
+                )
+
+    assert index.next(date(2025, 3, 12), 1000) == [
+        record for record in records if record.date >= date(2025, 3, 12)
+    ]
+    assert nearest.next("CA", date(2025, 3, 12), 1)[0].id == -1
+    with pytest.raises(KeyError):
+        nearest.next("OO", date(2025, 3, 12), 1)
+
+
+async def get_library_holidays(
+    session: AsyncSession, year: int
+) -> set[tuple[str, date, str, frozenset[str]]]:
+    holidays = await session.scalars(
+        select(Holiday)
+        .where(
+            Holiday.custom.is_(False),
+            Holiday.date.between(date(year, 1, 1), date(year, 12, 31)),
+        )
+        .options(selectinload(Holiday.states).selectinload(HolidayState.state))
+    )
+    return {
+        (
+            holiday.name,
+            holiday.date,
+            holiday.type,
+            frozenset(holiday_state.state.name for holiday_state in holiday.states),
+        )
+        for holiday in holidays
+    }
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_resync_db(db_session: AsyncSession):
+    report = await resync_db(db_session, [2030])
+    synced = await get_library_holidays(db_session, 2030)
+
+    assert report.deleted == [] and report.inserted
+    assert len(synced) == len(report.inserted)
+    assert not (await resync_db(db_session, [2030])).changed
+
+    version = await db_session.scalar(select(DatasetVersion.version))
+    holidays = list(
+        await db_session.scalars(
+            select(Holiday)
+            .where(Holiday.date.between(date(2030, 1, 1), date(2030, 12, 31)))
+            .options(selectinload(Holiday.states))
+            .order_by(Holiday.date, Holiday.id)
+        )
+    )
+    renamed, removed, retyped, restated = (
+        holidays[0],
+        holidays[1],
+        holidays[2],
+        next(holiday for holiday in holidays[3:] if len(holiday.states) > 1),
+    )
+    renamed_key = (renamed.name, renamed.date)
+    removed_key = (removed.name, removed.date)
+    await db_session.execute(
+        update(Holiday).where(Holiday.id == renamed.id).values(name="Renamed Day")
+    )
+    await db_session.execute(delete(Holiday).where(Holiday.id == removed.id))
+    await db_session.execute(
+        update(Holiday)
+        .where(Holiday.id == retyped.id)
+        .values(
+            type=HolidayTypeEnum.local
+            if retyped.type == HolidayTypeEnum.national
+            else HolidayTypeEnum.national
+        )
+    )
+    await db_session.execute(
+        delete(HolidayState).where(
+            HolidayState.holiday_id == restated.id,
+            HolidayState.state_id == restated.states[0].state_id,
+        )
+    )
+    db_session.add_all(
+        [
+            Holiday(
+                name="Bogus Day",
+                date=date(2030, 2, 2),
+                custom=False,
+                type=HolidayTypeEnum.local,
+            ),
+            Holiday(
+                name="Custom Day",
+                date=date(2030, 2, 3),
+                custom=True,
+                type=HolidayTypeEnum.local,
+            ),
+        ]
+    )
+    await db_session.commit()
+    report = await resync_db(db_session, [2030])
+
+    assert sorted(report.inserted) == sorted([renamed_key, removed_key])
+    assert sorted(report.deleted) == sorted(
+        [("Renamed Day", renamed.date), ("Bogus Day", date(2030, 2, 2))]
+    )
+    assert report.retyped == [(retyped.name, retyped.date)]
+    assert (report.states_added, report.states_removed) == (1, 0)
+    assert await get_library_holidays(db_session, 2030) == synced
+    assert await db_session.scalar(select(DatasetVersion.version)) == version + 1
+    assert await db_session.scalar(select(Holiday.id).filter_by(name="Custom Day"))
+
+    await db_session.execute(
+        delete(Holiday).where(
+            Holiday.date.between(date(2030, 1, 1), date(2030, 12, 31))
+        )
+    )
+    await db_session.commit()
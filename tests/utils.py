@@ -1,14 +1,21 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from collections.abc import Iterator
+from contextlib import contextmanager
 from datetime import date
 
 from src.usholidays.countryholidays.models import Holiday, HolidayState, State
 from src.usholidays.core.models import HolidayTypeEnum
 from src.usholidays.core.utils import us_states
 
+# счётчик запросов и секции живут в модулях, импортированных приложением без префикса src.usholidays
+from core.query_log import QueryStats, track_queries
+from countryholidays.partitions import holiday_partitions
+
 
 async def populate_test_db(session: AsyncSession):
+    await holiday_partitions.ensure(session, [2025])
     test_holiday = Holiday(
         name="Testing National Day",
         date=date(2025, 3, 12),
@@ -34,3 +41,18 @@ async def populate_test_db(session: AsyncSession):
     session.add(test_holiday)
 
     await session.commit()
+
+
+@contextmanager
+def assert_max_queries(max_statements: int) -> Iterator[QueryStats]:
+    """
+    Проверяет, что внутри блока к базе выполнено не больше
+    max_statements запросов, включая запросы приложения через client
+    """
+    with track_queries() as query_stats:
+        yield query_stats
+
+    assert query_stats.statements <= max_statements, (
+        f"{query_stats.statements} statements executed, "
+        f"expected at most {max_statements}"
+    )